@@ -0,0 +1,68 @@
+import os
+from collections import OrderedDict
+
+import pygame
+
+from piece import Piece
+
+
+class Assets(object):
+    """loads fonts, images and sprites once and keeps rendered text, so
+    frames reuse surfaces instead of building them again"""
+    def __init__(self, resources="res", text_cache_size=64):
+        # base folder for program resources
+        self.resources = resources
+        # most rendered text surfaces kept before the least recently used is dropped
+        self.text_cache_size = text_cache_size
+        # fonts keyed by (name, size)
+        self.fonts = {}
+        # rendered text keyed by (text, size, colour, antialias), least recently used first
+        self.texts = OrderedDict()
+        # converted images keyed by file name
+        self.images = {}
+        # chess piece spritesheets keyed by file name
+        self.sprites = {}
+        # transparent overlays keyed by (rgba colour, size)
+        self.overlays = {}
+
+    def font(self, size, name="comicsansms"):
+        """system font, looked up the first time it is asked for"""
+        key = (name, size)
+        if key not in self.fonts:
+            self.fonts[key] = pygame.font.SysFont(name, size)
+        return self.fonts[key]
+
+    def text(self, text, size, colour, antialias=True):
+        """surface with rendered text, reused while it stays in the cache"""
+        key = (text, size, colour, antialias)
+        surface = self.texts.get(key)
+        if surface is not None:
+            self.texts.move_to_end(key)
+            return surface
+        surface = self.font(size).render(text, antialias, colour)
+        self.texts[key] = surface
+        if len(self.texts) > self.text_cache_size:
+            self.texts.popitem(last=False)
+        return surface
+
+    def image(self, filename, alpha=False):
+        """image from the resources folder converted to the display format"""
+        if filename not in self.images:
+            image = pygame.image.load(os.path.join(self.resources, filename))
+            self.images[filename] = image.convert_alpha() if alpha else image.convert()
+        return self.images[filename]
+
+    def pieces(self, filename):
+        """chess piece sprites cut from a spritesheet in the resources folder"""
+        if filename not in self.sprites:
+            self.sprites[filename] = Piece(os.path.join(self.resources, filename), cols=6, rows=2)
+        return self.sprites[filename]
+
+    def overlay(self, rgba, size):
+        """transparent square filled with a colour, e.g. to highlight a square"""
+        key = (rgba, size)
+        if key not in self.overlays:
+            surface = pygame.Surface((size, size), pygame.SRCALPHA)
+            surface.fill(rgba)
+            self.overlays[key] = surface
+        return self.overlays[key]
@@ -0,0 +1,126 @@
+# attack tables precomputed once at import time
+#
+# squares use the same numbering as bitboard.py (a1 = 0, h8 = 63) and
+# colours are indexed white = 0, black = 1
+
+# ray directions as (file step, rank step), the first four increase the
+# square index and the last four decrease it
+NORTH = 0
+EAST = 1
+NORTH_EAST = 2
+NORTH_WEST = 3
+SOUTH = 4
+WEST = 5
+SOUTH_WEST = 6
+SOUTH_EAST = 7
+DIRECTIONS = [(0, 1), (1, 0), (1, 1), (-1, 1), (0, -1), (-1, 0), (-1, -1), (1, -1)]
+
+KNIGHT_STEPS = [(1, 2), (2, 1), (2, -1), (1, -2), (-1, -2), (-2, -1), (-2, 1), (-1, 2)]
+KING_STEPS = [(0, 1), (1, 1), (1, 0), (1, -1), (0, -1), (-1, -1), (-1, 0), (-1, 1)]
+
+
+def _step_table(steps):
+    """bitboard per square of the squares reached by single steps"""
+    table = []
+    for square in range(64):
+        bb = 0
+        for df, dr in steps:
+            f = (square & 7) + df
+            r = (square >> 3) + dr
+            if 0 <= f < 8 and 0 <= r < 8:
+                bb |= 1 << (r * 8 + f)
+        table.append(bb)
+    return table
+
+
+def _ray_table():
+    """bitboard per direction and square of the squares along the ray on an empty board"""
+    table = []
+    for df, dr in DIRECTIONS:
+        rays = []
+        for square in range(64):
+            bb = 0
+            f = (square & 7) + df
+            r = (square >> 3) + dr
+            while 0 <= f < 8 and 0 <= r < 8:
+                bb |= 1 << (r * 8 + f)
+                f += df
+                r += dr
+            rays.append(bb)
+        table.append(rays)
+    return table
+
+
+KNIGHT_ATTACKS = _step_table(KNIGHT_STEPS)
+KING_ATTACKS = _step_table(KING_STEPS)
+PAWN_ATTACKS = [_step_table([(-1, 1), (1, 1)]), _step_table([(-1, -1), (1, -1)])]
+RAYS = _ray_table()
+
+# rays per square, looked up once per call by the slider functions
+NORTH_RAYS = RAYS[NORTH]
+EAST_RAYS = RAYS[EAST]
+NORTH_EAST_RAYS = RAYS[NORTH_EAST]
+NORTH_WEST_RAYS = RAYS[NORTH_WEST]
+SOUTH_RAYS = RAYS[SOUTH]
+WEST_RAYS = RAYS[WEST]
+SOUTH_WEST_RAYS = RAYS[SOUTH_WEST]
+SOUTH_EAST_RAYS = RAYS[SOUTH_EAST]
+
+
+def _positive_ray(rays, square, occupied):
+    """ray of an increasing direction cut at its first blocker, the lowest set bit"""
+    ray = rays[square]
+    blockers = ray & occupied
+    if blockers:
+        return ray ^ rays[(blockers & -blockers).bit_length() - 1]
+    return ray
+
+
+def _negative_ray(rays, square, occupied):
+    """ray of a decreasing direction cut at its first blocker, the highest set bit"""
+    ray = rays[square]
+    blockers = ray & occupied
+    if blockers:
+        return ray ^ rays[blockers.bit_length() - 1]
+    return ray
+
+
+def rook_attacks(square, occupied):
+    """squares attacked by a rook on a square"""
+    return (_positive_ray(NORTH_RAYS, square, occupied) | _positive_ray(EAST_RAYS, square, occupied) |
+            _negative_ray(SOUTH_RAYS, square, occupied) | _negative_ray(WEST_RAYS, square, occupied))
+
+
+def bishop_attacks(square, occupied):
+    """squares attacked by a bishop on a square"""
+    return (_positive_ray(NORTH_EAST_RAYS, square, occupied) |
+            _positive_ray(NORTH_WEST_RAYS, square, occupied) |
+            _negative_ray(SOUTH_WEST_RAYS, square, occupied) |
+            _negative_ray(SOUTH_EAST_RAYS, square, occupied))
+
+
+def queen_attacks(square, occupied):
+    """squares attacked by a queen on a square"""
+    return rook_attacks(square, occupied) | bishop_attacks(square, occupied)
+
+
+def _between_table():
+    """bitboard per pair of squares of the squares strictly between them on a
+    shared rank, file or diagonal, empty when they are not aligned"""
+    table = [[0] * 64 for square in range(64)]
+    for direction in range(8):
+        df, dr = DIRECTIONS[direction]
+        for square in range(64):
+            between = 0
+            f = (square & 7) + df
+            r = (square >> 3) + dr
+            while 0 <= f < 8 and 0 <= r < 8:
+                target = r * 8 + f
+                table[square][target] = between
+                between |= 1 << target
+                f += df
+                r += dr
+    return table
+
+
+BETWEEN = _between_table()
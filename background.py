@@ -0,0 +1,93 @@
+import threading
+
+from move import move_name
+
+# moves of the best line shown while the computer thinks
+PROGRESS_MOVES = 5
+
+
+class BackgroundSearch(object):
+    """runs the search of a computer player on a worker thread, so the
+    window keeps drawing and handling events while it thinks
+
+    request starts a search of a copy of a position, poll returns the
+    move once it is found and cancel throws a search away"""
+    def __init__(self, search):
+        # Search or ParallelSearch doing the work
+        self.search = search
+        # thread of the running search and the event that stops it
+        self.thread = None
+        self.stop_event = None
+        # copy of the position being searched, owned by the worker thread
+        self.root = None
+        # hash of the position being searched
+        self.root_hash = None
+        # move found by the finished search, set by the worker thread
+        self.result = None
+        self.done = False
+        # depth and best line of the last completed iteration
+        self.lock = threading.Lock()
+        self.progress_info = None
+
+    @property
+    def thinking(self):
+        """whether a search has been requested and not yet collected"""
+        return self.thread is not None
+
+    def request(self, position):
+        """start searching a position, replacing any running search"""
+        self.cancel()
+        self.root = position.copy()
+        self.root_hash = self.root.hash
+        self.result = None
+        self.done = False
+        with self.lock:
+            self.progress_info = None
+        self.stop_event = threading.Event()
+        self.search.stop_event = self.stop_event
+        self.search.on_iteration = self.iteration_done
+        self.thread = threading.Thread(target=self.think, args=(self.root,))
+        self.thread.daemon = True
+        self.thread.start()
+
+    def think(self, root):
+        """worker thread: search the position and leave the move for poll"""
+        self.result = self.search.search(root)
+        self.done = True
+
+    def iteration_done(self, search):
+        """worker thread: remember the result of a completed iteration"""
+        line = search.principal_variation(self.root)[:PROGRESS_MOVES]
+        # a parallel search also counts the nodes of every worker process
+        workers = [search.worker_nodes[worker] for worker in sorted(getattr(search, "worker_nodes", {}))]
+        with self.lock:
+            self.progress_info = (search.depth, [move_name(move) for move in line], workers)
+
+    def poll(self, position):
+        """the best move once the search of position has finished, None while
+        it is still thinking or when it searched another position"""
+        if self.thread is None or not self.done:
+            return None
+        self.thread.join()
+        self.thread = None
+        if position.hash != self.root_hash:
+            return None
+        return self.result
+
+    def cancel(self):
+        """stop the running search and throw its move away"""
+        if self.thread is not None:
+            self.stop_event.set()
+            self.thread.join()
+            self.thread = None
+
+    def progress(self):
+        """(depth, nodes, best line, nodes per worker) of the running search,
+        None before the first iteration completes. nodes per worker is empty
+        unless the search runs in worker processes"""
+        with self.lock:
+            info = self.progress_info
+        if info is None:
+            return None
+        depth, line, workers = info
+        return depth, self.search.nodes, line, workers
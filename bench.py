@@ -0,0 +1,91 @@
+import argparse
+import json
+import sys
+import time
+
+from bitboard import Position
+from move import move_name
+from perft import REFERENCE_POSITIONS
+from parallel import ParallelSearch
+from search import Search
+from tournament import parse_engine
+
+
+def run(name, fen, depth, engine, workers=1):
+    """search a position to a fixed depth and return a record of the effort"""
+    if workers > 1:
+        search = ParallelSearch(workers, max_depth=depth, **engine)
+    else:
+        search = Search(max_depth=depth, **engine)
+    position = Position.from_fen(fen)
+    start = time.perf_counter()
+    move = search.search(position)
+    seconds = time.perf_counter() - start
+    if workers > 1:
+        search.close()
+    record = {
+        "name": name,
+        "fen": fen,
+        "depth": search.depth,
+        "seldepth": search.seldepth,
+        "move": move_name(move) if move is not None else None,
+        "score": search.score,
+        "nodes": search.nodes,
+        "seconds": round(seconds, 6),
+        "nps": int(search.nodes / seconds) if seconds > 0 else 0,
+    }
+    if search.ordering is not None:
+        record["cutoffs"] = search.ordering.cutoffs
+        record["first_move_cutoff_rate"] = round(search.ordering.first_move_cutoff_rate, 4)
+    if workers > 1:
+        record["worker_nodes"] = [search.worker_nodes[worker] for worker in sorted(search.worker_nodes)]
+    return record
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="search the reference positions to a fixed depth and count nodes")
+    parser.add_argument("--depth", type=int, default=4, help="depth to search every position to")
+    parser.add_argument("--engine", default="", help="search settings, e.g. hash=32,see=off")
+    parser.add_argument("--fen", default=None, help="search only this position")
+    parser.add_argument("--workers", type=int, default=1, help="processes to search with")
+    parser.add_argument("--json", action="store_true", help="print machine readable json instead of text")
+    args = parser.parse_args(argv)
+    if args.fen is not None:
+        # report a bad fen before searching
+        try:
+            Position.from_fen(args.fen)
+        except ValueError as error:
+            parser.error(str(error))
+
+    engine = parse_engine(args.engine)
+    engine.pop("max_depth", None)
+    if args.fen is not None:
+        positions = [("custom", args.fen)]
+    else:
+        positions = [(reference["name"], reference["fen"]) for reference in REFERENCE_POSITIONS]
+    records = [run(name, fen, args.depth, engine, args.workers) for name, fen in positions]
+
+    total_nodes = sum(record["nodes"] for record in records)
+    total_seconds = sum(record["seconds"] for record in records)
+    if args.json:
+        print(json.dumps({
+            "records": records,
+            "total_nodes": total_nodes,
+            "total_seconds": round(total_seconds, 6),
+            "nps": int(total_nodes / total_seconds) if total_seconds > 0 else 0,
+        }, indent=2))
+    else:
+        for record in records:
+            line = "{name:10} depth {depth}/{seldepth:<2}  {move}  score {score:6}  nodes {nodes:9}  {seconds:8.3f}s".format(**record)
+            if "first_move_cutoff_rate" in record:
+                line += "  first move cutoffs {:.1%}".format(record["first_move_cutoff_rate"])
+            if "worker_nodes" in record:
+                line += "  workers " + " / ".join(str(count) for count in record["worker_nodes"])
+            print(line)
+        print("total nodes {}  {:.3f}s  {} nps".format(total_nodes, total_seconds,
+                                                       int(total_nodes / total_seconds) if total_seconds > 0 else 0))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,746 @@
+# bitboard backed chess position
+#
+# squares are numbered 0..63 with a1 = 0, b1 = 1, ..., h8 = 63, so the
+# square index is rank * 8 + file. the ui uses [x, y] coordinates where
+# x is the file and y counts rows from the top of the board (rank 8)
+
+from zobrist import PIECE_KEYS, SIDE_KEY, CASTLING_KEYS, EP_KEYS
+from pst import SQUARE_SCORES
+from attacks import (KNIGHT_ATTACKS, KING_ATTACKS, PAWN_ATTACKS, BETWEEN,
+                     rook_attacks, bishop_attacks, queen_attacks)
+from move import (DOUBLE_PUSH, KING_CASTLE, QUEEN_CASTLE, EP_CAPTURE, CAPTURE_BITS, PROMOTION_BITS, NULL_MOVE,
+                  encode_move, new_move_buffer, move_name, promotion_piece)
+
+# colours
+WHITE = 0
+BLACK = 1
+
+# piece types
+PAWN = 0
+KNIGHT = 1
+BISHOP = 2
+ROOK = 3
+QUEEN = 4
+KING = 5
+
+# names used by the ui for colours and piece types
+COLOUR_NAMES = ["white", "black"]
+PIECE_NAMES = ["pawn", "knight", "bishop", "rook", "queen", "king"]
+
+# every square set
+FULL_BOARD = 0xFFFFFFFFFFFFFFFF
+# file masks
+FILE_A = 0x0101010101010101
+FILE_H = FILE_A << 7
+# rank masks
+RANK_1 = 0xFF
+RANK_2 = RANK_1 << 8
+RANK_3 = RANK_1 << 16
+RANK_6 = RANK_1 << 40
+RANK_7 = RANK_1 << 48
+RANK_8 = RANK_1 << 56
+
+# castling right flags
+WHITE_KINGSIDE = 1
+WHITE_QUEENSIDE = 2
+BLACK_KINGSIDE = 4
+BLACK_QUEENSIDE = 8
+ALL_CASTLING = WHITE_KINGSIDE | WHITE_QUEENSIDE | BLACK_KINGSIDE | BLACK_QUEENSIDE
+
+# castling rights kept when a piece moves from or to a square, so moving a
+# king or rook, or capturing a rook on its starting square, drops the right
+CASTLING_KEPT = [ALL_CASTLING] * 64
+CASTLING_KEPT[0] = ALL_CASTLING ^ WHITE_QUEENSIDE
+CASTLING_KEPT[4] = ALL_CASTLING ^ (WHITE_KINGSIDE | WHITE_QUEENSIDE)
+CASTLING_KEPT[7] = ALL_CASTLING ^ WHITE_KINGSIDE
+CASTLING_KEPT[56] = ALL_CASTLING ^ BLACK_QUEENSIDE
+CASTLING_KEPT[60] = ALL_CASTLING ^ (BLACK_KINGSIDE | BLACK_QUEENSIDE)
+CASTLING_KEPT[63] = ALL_CASTLING ^ BLACK_KINGSIDE
+
+# castling moves as (right, king square, rook square, squares that must be
+# empty, squares the king must not be attacked on, encoded move)
+CASTLING_MOVES = [
+    [(WHITE_KINGSIDE, 4, 7, (1 << 5) | (1 << 6), [5, 6], encode_move(4, 6, KING_CASTLE)),
+     (WHITE_QUEENSIDE, 4, 0, (1 << 1) | (1 << 2) | (1 << 3), [3, 2], encode_move(4, 2, QUEEN_CASTLE))],
+    [(BLACK_KINGSIDE, 60, 63, (1 << 61) | (1 << 62), [61, 62], encode_move(60, 62, KING_CASTLE)),
+     (BLACK_QUEENSIDE, 60, 56, (1 << 57) | (1 << 58) | (1 << 59), [59, 58], encode_move(60, 58, QUEEN_CASTLE))],
+]
+# promotion flags shifted into place, queen first
+PROMOTION_MOVE_BITS = [(PROMOTION_BITS | ((piece_type - 1) << 12)) for piece_type in (QUEEN, ROOK, BISHOP, KNIGHT)]
+
+# back rank layout of the starting position from the a file to the h file
+BACK_RANK = [ROOK, KNIGHT, BISHOP, QUEEN, KING, BISHOP, KNIGHT, ROOK]
+
+# fen of the starting position
+START_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+# fen letters of the piece types, upper case for white
+PIECE_LETTERS = "pnbrqk"
+# fen letters of the castling right flags
+CASTLING_LETTERS = [("K", WHITE_KINGSIDE), ("Q", WHITE_QUEENSIDE),
+                    ("k", BLACK_KINGSIDE), ("q", BLACK_QUEENSIDE)]
+
+
+def square_from_coord(x, y):
+    """convert ui [x, y] coordinates to a square index"""
+    return (7 - y) * 8 + x
+
+
+def coord_from_square(square):
+    """convert a square index to ui [x, y] coordinates"""
+    return [square & 7, 7 - (square >> 3)]
+
+
+def square_name(square):
+    """name of a square in algebraic notation, e.g. 'e4'"""
+    return chr(97 + (square & 7)) + str((square >> 3) + 1)
+
+
+def parse_square(name):
+    """square index of an algebraic square name, e.g. 'e4'"""
+    return (int(name[1]) - 1) * 8 + ord(name[0]) - 97
+
+
+def piece_name(colour, piece_type):
+    """ui name of a piece, e.g. 'white_knight'"""
+    return COLOUR_NAMES[colour] + "_" + PIECE_NAMES[piece_type]
+
+
+def iter_bits(bb):
+    """yield the square index of every set bit of a bitboard"""
+    while bb:
+        # isolate the least significant bit
+        lsb = bb & -bb
+        yield lsb.bit_length() - 1
+        bb ^= lsb
+
+
+def pop_count(bb):
+    """number of set bits of a bitboard"""
+    return bin(bb).count("1")
+
+
+class Position(object):
+    def __init__(self):
+        # one bitboard per colour and piece type
+        self.bitboards = [[0] * 6, [0] * 6]
+        # occupancy of each colour
+        self.occupancy = [0, 0]
+        # occupancy of both colours
+        self.occupied = 0
+        # mailbox of (colour, piece type) per square, None for empty squares
+        self.squares = [None] * 64
+        # colour to move
+        self.side = WHITE
+        # castling right flags
+        self.castling = 0
+        # en passant target square or None
+        self.ep_square = None
+        # half moves since the last capture or pawn move
+        self.halfmove = 0
+        # number of the current full move
+        self.fullmove = 1
+        # zobrist hash of the position, kept up to date by every change
+        self.hash = 0
+        # material and piece-square score from white's point of view, kept up to date by every change
+        self.score = 0
+        # undo records of the moves played with make_move, most recent last
+        self.undo_stack = []
+
+    @classmethod
+    def starting(cls, side=WHITE):
+        """create a position with the pieces in their starting squares"""
+        position = cls()
+        position.side = side
+        for f in range(8):
+            position.put(WHITE, BACK_RANK[f], f)
+            position.put(WHITE, PAWN, 8 + f)
+            position.put(BLACK, PAWN, 48 + f)
+            position.put(BLACK, BACK_RANK[f], 56 + f)
+        position.castling = ALL_CASTLING
+        position.hash = position.compute_hash()
+        return position
+
+    @classmethod
+    def from_fen(cls, fen):
+        """create a position from a fen string, raising ValueError when it is malformed or illegal"""
+        fields = fen.split()
+        if not 1 <= len(fields) <= 6:
+            raise ValueError("fen needs 1 to 6 fields: {!r}".format(fen))
+        position = cls()
+
+        # piece placement, listed from rank 8 down to rank 1
+        ranks = fields[0].split("/")
+        if len(ranks) != 8:
+            raise ValueError("fen needs 8 ranks: {!r}".format(fields[0]))
+        for rank_no, rank in zip(range(7, -1, -1), ranks):
+            file_no = 0
+            for char in rank:
+                if char in "12345678":
+                    file_no += int(char)
+                elif char.lower() in PIECE_LETTERS and file_no < 8:
+                    colour = WHITE if char.isupper() else BLACK
+                    position.put(colour, PIECE_LETTERS.index(char.lower()), rank_no * 8 + file_no)
+                    file_no += 1
+                else:
+                    raise ValueError("bad fen rank {!r}".format(rank))
+            if file_no != 8:
+                raise ValueError("fen rank {!r} does not have 8 squares".format(rank))
+
+        # side to move
+        if len(fields) > 1 and fields[1] not in ("w", "b"):
+            raise ValueError("bad fen side to move {!r}".format(fields[1]))
+        position.side = BLACK if len(fields) > 1 and fields[1] == "b" else WHITE
+
+        # castling rights
+        if len(fields) > 2 and fields[2] != "-":
+            for char in fields[2]:
+                if char not in "KQkq":
+                    raise ValueError("bad fen castling rights {!r}".format(fields[2]))
+            for letter, flag in CASTLING_LETTERS:
+                if letter in fields[2]:
+                    position.castling |= flag
+
+        # en passant target square
+        if len(fields) > 3 and fields[3] != "-":
+            if len(fields[3]) != 2 or fields[3][0] not in "abcdefgh" or fields[3][1] not in "36":
+                raise ValueError("bad fen en passant square {!r}".format(fields[3]))
+            position.ep_square = parse_square(fields[3])
+
+        # move clocks
+        if len(fields) > 4:
+            if not fields[4].isdigit() or (len(fields) > 5 and not fields[5].isdigit()):
+                raise ValueError("bad fen move clocks {!r}".format(" ".join(fields[4:])))
+            position.halfmove = int(fields[4])
+            if len(fields) > 5:
+                position.fullmove = max(1, int(fields[5]))
+        position.validate()
+        position.hash = position.compute_hash()
+        return position
+
+    def validate(self):
+        """raise ValueError unless the pieces, castling rights and en passant
+        square make a legal position"""
+        for colour in (WHITE, BLACK):
+            if pop_count(self.bitboards[colour][KING]) != 1:
+                raise ValueError("{} needs exactly one king".format(COLOUR_NAMES[colour]))
+            if self.bitboards[colour][PAWN] & (RANK_1 | RANK_8):
+                raise ValueError("{} has a pawn on the first or last rank".format(COLOUR_NAMES[colour]))
+            for right, king_sq, rook_sq, path, safe, move in CASTLING_MOVES[colour]:
+                if self.castling & right and (self.squares[king_sq] != (colour, KING) or
+                                              self.squares[rook_sq] != (colour, ROOK)):
+                    raise ValueError("{} castling right without king and rook on {} and {}".format(
+                        COLOUR_NAMES[colour], square_name(king_sq), square_name(rook_sq)))
+        if self.in_check(self.side ^ 1):
+            raise ValueError("the side not to move is in check")
+        if self.ep_square is not None:
+            # the pawn that just moved two squares stands in front of the target square
+            pushed = self.ep_square - 8 if self.side == WHITE else self.ep_square + 8
+            if (self.ep_square >> 3) != (5 if self.side == WHITE else 2) or \
+                    self.squares[pushed] != (self.side ^ 1, PAWN):
+                raise ValueError("no pawn to take en passant on {}".format(square_name(self.ep_square)))
+
+    def to_fen(self):
+        """fen string of the position"""
+        ranks = []
+        for rank_no in range(7, -1, -1):
+            rank = ""
+            empty = 0
+            for file_no in range(8):
+                piece = self.squares[rank_no * 8 + file_no]
+                if piece is None:
+                    empty += 1
+                    continue
+                if empty:
+                    rank += str(empty)
+                    empty = 0
+                letter = PIECE_LETTERS[piece[1]]
+                rank += letter.upper() if piece[0] == WHITE else letter
+            if empty:
+                rank += str(empty)
+            ranks.append(rank)
+        castling = "".join(letter for letter, flag in CASTLING_LETTERS if self.castling & flag) or "-"
+        ep = square_name(self.ep_square) if self.ep_square is not None else "-"
+        return "{} {} {} {} {} {}".format("/".join(ranks), "w" if self.side == WHITE else "b",
+                                          castling, ep, self.halfmove, self.fullmove)
+
+    def copy(self):
+        """return an independent copy of the position, with the moves played
+        before it so a search of the copy still sees repetitions"""
+        position = Position.__new__(Position)
+        position.bitboards = [self.bitboards[WHITE][:], self.bitboards[BLACK][:]]
+        position.occupancy = self.occupancy[:]
+        position.occupied = self.occupied
+        position.squares = self.squares[:]
+        position.side = self.side
+        position.castling = self.castling
+        position.ep_square = self.ep_square
+        position.halfmove = self.halfmove
+        position.fullmove = self.fullmove
+        position.hash = self.hash
+        position.score = self.score
+        # the undo records are tuples, so sharing them is safe
+        position.undo_stack = self.undo_stack[:]
+        return position
+
+    def compute_hash(self):
+        """zobrist hash computed from scratch, used after setting up a position"""
+        key = 0
+        for square in iter_bits(self.occupied):
+            colour, piece_type = self.squares[square]
+            key ^= PIECE_KEYS[colour][piece_type][square]
+        if self.side == BLACK:
+            key ^= SIDE_KEY
+        key ^= CASTLING_KEYS[self.castling]
+        if self.ep_square is not None:
+            key ^= EP_KEYS[self.ep_square & 7]
+        return key
+
+    def put(self, colour, piece_type, square):
+        """place a piece on an empty square"""
+        bit = 1 << square
+        self.bitboards[colour][piece_type] |= bit
+        self.occupancy[colour] |= bit
+        self.occupied |= bit
+        self.squares[square] = (colour, piece_type)
+        self.hash ^= PIECE_KEYS[colour][piece_type][square]
+        self.score += SQUARE_SCORES[colour][piece_type][square]
+
+    def shift(self, colour, piece_type, from_sq, to_sq):
+        """move a piece from its square to an empty square"""
+        mask = (1 << from_sq) | (1 << to_sq)
+        self.bitboards[colour][piece_type] ^= mask
+        self.occupancy[colour] ^= mask
+        self.occupied ^= mask
+        self.squares[to_sq] = self.squares[from_sq]
+        self.squares[from_sq] = None
+        keys = PIECE_KEYS[colour][piece_type]
+        self.hash ^= keys[from_sq] ^ keys[to_sq]
+        scores = SQUARE_SCORES[colour][piece_type]
+        self.score += scores[to_sq] - scores[from_sq]
+
+    def remove(self, square):
+        """remove the piece on a square and return it"""
+        piece = self.squares[square]
+        if piece is not None:
+            colour, piece_type = piece
+            mask = FULL_BOARD ^ (1 << square)
+            self.bitboards[colour][piece_type] &= mask
+            self.occupancy[colour] &= mask
+            self.occupied &= mask
+            self.squares[square] = None
+            self.hash ^= PIECE_KEYS[colour][piece_type][square]
+            self.score -= SQUARE_SCORES[colour][piece_type][square]
+        return piece
+
+    def piece_at(self, square):
+        """(colour, piece type) on a square or None"""
+        return self.squares[square]
+
+    def king_square(self, colour):
+        """square of the king of a colour or None if it has been captured"""
+        bb = self.bitboards[colour][KING]
+        if bb:
+            return bb.bit_length() - 1
+        return None
+
+    def attacks_from(self, square):
+        """squares attacked by the piece on a square"""
+        colour, piece_type = self.squares[square]
+        if piece_type == PAWN:
+            return PAWN_ATTACKS[colour][square]
+        if piece_type == KNIGHT:
+            return KNIGHT_ATTACKS[square]
+        if piece_type == KING:
+            return KING_ATTACKS[square]
+        if piece_type == BISHOP:
+            return bishop_attacks(square, self.occupied)
+        if piece_type == ROOK:
+            return rook_attacks(square, self.occupied)
+        return queen_attacks(square, self.occupied)
+
+    def attackers_to(self, square, colour, occupied=None):
+        """bitboard of the pieces of a colour attacking a square, with sliders
+        seeing through everything missing from the occupied bitboard"""
+        if occupied is None:
+            occupied = self.occupied
+        bitboards = self.bitboards[colour]
+        return ((PAWN_ATTACKS[colour ^ 1][square] & bitboards[PAWN]) |
+                (KNIGHT_ATTACKS[square] & bitboards[KNIGHT]) |
+                (KING_ATTACKS[square] & bitboards[KING]) |
+                (bishop_attacks(square, occupied) & (bitboards[BISHOP] | bitboards[QUEEN])) |
+                (rook_attacks(square, occupied) & (bitboards[ROOK] | bitboards[QUEEN])))
+
+    def in_check(self, colour=None):
+        """whether the king of a colour, by default the side to move, is attacked"""
+        if colour is None:
+            colour = self.side
+        king = self.king_square(colour)
+        return king is not None and self.attackers_to(king, colour ^ 1) != 0
+
+    def generate_moves(self, buffer):
+        """write the legal moves of the side to move into a move buffer and
+        return how many there are
+
+        moves are 16 bit ints (see move.py). check and pin masks are computed
+        once, so no move has to be played to find out whether it is legal"""
+        n = 0
+        us = self.side
+        them = us ^ 1
+        own = self.occupancy[us]
+        enemy = self.occupancy[them]
+        occupied = self.occupied
+        bitboards = self.bitboards[us]
+        theirs = self.bitboards[them]
+
+        king = self.king_square(us)
+        if king is None:
+            return 0
+        king_bit = 1 << king
+
+        # the king may go to any square that is not attacked once it has left
+        # its square, so sliders checking it along a line still cover the squares behind it
+        occupied_without_king = occupied ^ king_bit
+        for target in iter_bits(KING_ATTACKS[king] & ~own):
+            if not self.attackers_to(target, them, occupied_without_king):
+                buffer[n] = king | (target << 6) | (CAPTURE_BITS if enemy >> target & 1 else 0)
+                n += 1
+
+        checkers = self.attackers_to(king, them, occupied)
+        # only the king can move out of a double check
+        if checkers & (checkers - 1):
+            return n
+        # other pieces have to capture the checking piece or block its line
+        if checkers:
+            check_mask = checkers | BETWEEN[king][checkers.bit_length() - 1]
+        else:
+            check_mask = FULL_BOARD
+
+        # pinned pieces may only move along the line between the king and the pinner
+        diagonal = theirs[BISHOP] | theirs[QUEEN]
+        straight = theirs[ROOK] | theirs[QUEEN]
+        pins = {}
+        snipers = (rook_attacks(king, enemy) & straight) | (bishop_attacks(king, enemy) & diagonal)
+        for sniper in iter_bits(snipers):
+            line = BETWEEN[king][sniper]
+            blockers = line & occupied
+            # exactly one piece in between, and it is ours
+            if blockers and not blockers & (blockers - 1) and blockers & own:
+                pins[blockers.bit_length() - 1] = line | (1 << sniper)
+
+        # squares the other pieces may capture on or move to
+        captures = enemy & check_mask
+        quiets = (FULL_BOARD ^ occupied) & check_mask
+
+        # pawns
+        empty = FULL_BOARD ^ occupied
+        if us == WHITE:
+            forward = 8
+            double_rank = RANK_3
+            promotion_rank = RANK_8
+        else:
+            forward = -8
+            double_rank = RANK_6
+            promotion_rank = RANK_1
+        ep_square = self.ep_square
+        for square in iter_bits(bitboards[PAWN]):
+            pin = pins.get(square, FULL_BOARD)
+            targets = PAWN_ATTACKS[us][square] & captures & pin
+            for target in iter_bits(targets & promotion_rank):
+                for bits in PROMOTION_MOVE_BITS:
+                    buffer[n] = square | (target << 6) | bits | CAPTURE_BITS
+                    n += 1
+            for target in iter_bits(targets & ~promotion_rank):
+                buffer[n] = square | (target << 6) | CAPTURE_BITS
+                n += 1
+
+            single = (1 << (square + forward)) & empty
+            if single:
+                if single & quiets & pin:
+                    target = square + forward
+                    if single & promotion_rank:
+                        for bits in PROMOTION_MOVE_BITS:
+                            buffer[n] = square | (target << 6) | bits
+                            n += 1
+                    else:
+                        buffer[n] = square | (target << 6)
+                        n += 1
+                # a pawn that could step onto its third rank may step again
+                if single & double_rank and (1 << (square + 2 * forward)) & quiets & pin:
+                    buffer[n] = square | ((square + 2 * forward) << 6) | (DOUBLE_PUSH << 12)
+                    n += 1
+
+            # en passant
+            if ep_square is not None and PAWN_ATTACKS[us][square] & (1 << ep_square):
+                captured_bit = 1 << (ep_square - forward)
+                # it has to capture the checking pawn or block the check
+                if checkers and not ((1 << ep_square) | captured_bit) & check_mask:
+                    continue
+                # both pawns leave the line between the king and any slider
+                after = (occupied ^ (1 << square) ^ captured_bit) | (1 << ep_square)
+                if rook_attacks(king, after) & straight or bishop_attacks(king, after) & diagonal:
+                    continue
+                buffer[n] = square | (ep_square << 6) | (EP_CAPTURE << 12)
+                n += 1
+
+        # knights, a pinned knight can never move
+        for square in iter_bits(bitboards[KNIGHT]):
+            if square not in pins:
+                attacks = KNIGHT_ATTACKS[square]
+                for target in iter_bits(attacks & captures):
+                    buffer[n] = square | (target << 6) | CAPTURE_BITS
+                    n += 1
+                for target in iter_bits(attacks & quiets):
+                    buffer[n] = square | (target << 6)
+                    n += 1
+
+        # sliding pieces
+        for piece_type, slider_attacks in ((BISHOP, bishop_attacks), (ROOK, rook_attacks),
+                                           (QUEEN, queen_attacks)):
+            for square in iter_bits(bitboards[piece_type]):
+                attacks = slider_attacks(square, occupied) & pins.get(square, FULL_BOARD)
+                for target in iter_bits(attacks & captures):
+                    buffer[n] = square | (target << 6) | CAPTURE_BITS
+                    n += 1
+                for target in iter_bits(attacks & quiets):
+                    buffer[n] = square | (target << 6)
+                    n += 1
+
+        # castling, never out of check, through pieces or across attacked squares
+        if self.castling and not checkers:
+            for right, king_from, rook_from, path, safe, move in CASTLING_MOVES[us]:
+                if (self.castling & right and king == king_from and not occupied & path and
+                        self.squares[rook_from] == (us, ROOK)):
+                    for passed in safe:
+                        if self.attackers_to(passed, them, occupied):
+                            break
+                    else:
+                        buffer[n] = move
+                        n += 1
+        return n
+
+    def legal_moves(self):
+        """list of the legal moves of the side to move"""
+        buffer = new_move_buffer()
+        return buffer[:self.generate_moves(buffer)].tolist()
+
+    def parse_move(self, name):
+        """legal move matching a long algebraic (uci) name like 'e2e4' or 'e7e8q', or None"""
+        name = name.strip().lower()
+        for move in self.legal_moves():
+            if move_name(move) == name:
+                return move
+        return None
+
+    def parse_san(self, san):
+        """legal move matching a standard algebraic (san) name like 'Nbd7',
+        'exd5', 'O-O' or 'e8=Q+', or None when no single legal move matches"""
+        san = san.rstrip("+#!?")
+        if san in ("O-O", "0-0", "O-O-O", "0-0-0"):
+            flags = KING_CASTLE if len(san) == 3 else QUEEN_CASTLE
+            for move in self.legal_moves():
+                if move >> 12 == flags:
+                    return move
+            return None
+
+        # promotion piece, written 'e8=Q' or 'e8Q'
+        promotion = None
+        if "=" in san:
+            san, letter = san.split("=", 1)
+            if len(letter) != 1 or letter not in "QRBN":
+                return None
+            promotion = PIECE_LETTERS.index(letter.lower())
+        elif len(san) > 2 and san[-1] in "QRBN" and san[-2] in "18":
+            promotion = PIECE_LETTERS.index(san[-1].lower())
+            san = san[:-1]
+
+        # moving piece, destination and the file or rank telling pieces apart
+        piece_type = PAWN
+        if san[:1] in ("N", "B", "R", "Q", "K"):
+            piece_type = PIECE_LETTERS.index(san[0].lower())
+            san = san[1:]
+        san = san.replace("x", "").replace("-", "")
+        if len(san) < 2 or san[-2] not in "abcdefgh" or san[-1] not in "12345678":
+            return None
+        to_sq = parse_square(san[-2:])
+        hint = san[:-2]
+
+        found = None
+        for move in self.legal_moves():
+            from_sq = move & 63
+            if (move >> 6) & 63 != to_sq or self.squares[from_sq][1] != piece_type:
+                continue
+            if (promotion_piece(move) if move & PROMOTION_BITS else None) != promotion:
+                continue
+            if any(char != ("abcdefgh"[from_sq & 7] if char.isalpha() else str((from_sq >> 3) + 1))
+                   for char in hint):
+                continue
+            if found is not None:
+                # ambiguous
+                return None
+            found = move
+        return found
+
+    def is_checkmate(self):
+        """whether the side to move is in check and has no legal move"""
+        return self.in_check() and not self.legal_moves()
+
+    def is_stalemate(self):
+        """whether the side to move is not in check but has no legal move"""
+        return not self.in_check() and not self.legal_moves()
+
+    def repetitions(self):
+        """how many times the current position occurred before in the moves played with make_move"""
+        count = 0
+        # positions before the last capture or pawn move cannot repeat
+        stack = self.undo_stack
+        for i in range(len(stack) - 2, max(-1, len(stack) - 1 - self.halfmove), -2):
+            if stack[i][5] == self.hash:
+                count += 1
+        return count
+
+    def insufficient_material(self):
+        """whether neither side has the material left to checkmate"""
+        white = self.bitboards[WHITE]
+        black = self.bitboards[BLACK]
+        if white[PAWN] or black[PAWN] or white[ROOK] or black[ROOK] or white[QUEEN] or black[QUEEN]:
+            return False
+        # a single minor piece between both sides cannot mate
+        return pop_count(white[KNIGHT] | white[BISHOP] | black[KNIGHT] | black[BISHOP]) <= 1
+
+    def is_draw(self):
+        """draw by the fifty move rule, threefold repetition or insufficient material"""
+        return self.halfmove >= 100 or self.repetitions() >= 2 or self.insufficient_material()
+
+    def make_move(self, move):
+        """play a move in place, push its undo record on the undo stack and return it"""
+        from_sq = move & 63
+        to_sq = (move >> 6) & 63
+        flags = move >> 12
+        colour, piece_type = self.squares[from_sq]
+        key = self.hash
+        captured = None
+        if move & CAPTURE_BITS:
+            captured_sq = to_sq
+            # en passant takes the pawn beside the moving pawn
+            if flags == EP_CAPTURE:
+                captured_sq = to_sq - 8 if colour == WHITE else to_sq + 8
+            captured = self.squares[captured_sq]
+            # take the captured piece off the board
+            self.remove(captured_sq)
+        # remember everything the move destroys
+        undo = (move, captured, self.castling, self.ep_square, self.halfmove, key)
+
+        # move the piece to its destination
+        self.shift(colour, piece_type, from_sq, to_sq)
+
+        # castling also moves the rook next to the king
+        if flags == KING_CASTLE:
+            self.shift(colour, ROOK, from_sq + 3, from_sq + 1)
+        elif flags == QUEEN_CASTLE:
+            self.shift(colour, ROOK, from_sq - 4, from_sq - 1)
+        elif move & PROMOTION_BITS:
+            # replace a promoted pawn
+            self.remove(to_sq)
+            self.put(colour, ((flags & 3) + KNIGHT), to_sq)
+
+        # update castling rights
+        rights = self.castling & CASTLING_KEPT[from_sq] & CASTLING_KEPT[to_sq]
+        if rights != self.castling:
+            self.hash ^= CASTLING_KEYS[self.castling] ^ CASTLING_KEYS[rights]
+            self.castling = rights
+
+        # a double pawn push leaves an en passant target square behind
+        if self.ep_square is not None:
+            self.hash ^= EP_KEYS[self.ep_square & 7]
+            self.ep_square = None
+        if flags == DOUBLE_PUSH:
+            self.ep_square = (from_sq + to_sq) >> 1
+            self.hash ^= EP_KEYS[self.ep_square & 7]
+
+        # update move clocks
+        if captured is not None or piece_type == PAWN:
+            self.halfmove = 0
+        else:
+            self.halfmove += 1
+        if colour == BLACK:
+            self.fullmove += 1
+
+        # hand the move to the other colour
+        self.side = colour ^ 1
+        self.hash ^= SIDE_KEY
+
+        self.undo_stack.append(undo)
+        return undo
+
+    def unmake_move(self):
+        """take back the last move played with make_move and return its undo record"""
+        undo = self.undo_stack.pop()
+        move, captured, castling, ep_square, halfmove, key = undo
+        from_sq = move & 63
+        to_sq = (move >> 6) & 63
+        flags = move >> 12
+        colour, piece_type = self.squares[to_sq]
+
+        # turn a promoted piece back into a pawn
+        if move & PROMOTION_BITS:
+            self.remove(to_sq)
+            self.put(colour, PAWN, to_sq)
+            piece_type = PAWN
+
+        # move the piece back
+        self.shift(colour, piece_type, to_sq, from_sq)
+        # put the castled rook back in its corner
+        if flags == KING_CASTLE:
+            self.shift(colour, ROOK, from_sq + 1, from_sq + 3)
+        elif flags == QUEEN_CASTLE:
+            self.shift(colour, ROOK, from_sq - 1, from_sq - 4)
+
+        # restore the captured piece
+        if captured is not None:
+            if flags == EP_CAPTURE:
+                self.put(captured[0], captured[1], to_sq - 8 if colour == WHITE else to_sq + 8)
+            else:
+                self.put(captured[0], captured[1], to_sq)
+
+        # restore the state the move destroyed
+        self.castling = castling
+        self.ep_square = ep_square
+        self.halfmove = halfmove
+        if colour == BLACK:
+            self.fullmove -= 1
+        self.side = colour
+        self.hash = key
+        return undo
+
+    def make_null_move(self):
+        """pass the turn to the other colour without moving, for null move
+        pruning. pushes an undo record with NULL_MOVE as its move"""
+        undo = (NULL_MOVE, None, self.castling, self.ep_square, self.halfmove, self.hash)
+        if self.ep_square is not None:
+            self.hash ^= EP_KEYS[self.ep_square & 7]
+            self.ep_square = None
+        # positions before a null move are not repeated by the moves after it
+        self.halfmove = 0
+        if self.side == BLACK:
+            self.fullmove += 1
+        self.side ^= 1
+        self.hash ^= SIDE_KEY
+        self.undo_stack.append(undo)
+        return undo
+
+    def unmake_null_move(self):
+        """take back the last make_null_move"""
+        undo = self.undo_stack.pop()
+        self.ep_square = undo[3]
+        self.halfmove = undo[4]
+        self.hash = undo[5]
+        self.side ^= 1
+        if self.side == BLACK:
+            self.fullmove -= 1
+        return undo
+
+    def has_pieces(self, colour):
+        """whether a colour has anything besides its king and pawns, the
+        positions where zugzwang is rare enough to try null moves"""
+        bitboards = self.bitboards[colour]
+        return (bitboards[KNIGHT] | bitboards[BISHOP] | bitboards[ROOK] | bitboards[QUEEN]) != 0
@@ -0,0 +1,136 @@
+import argparse
+import mmap
+import os
+import struct
+import sys
+
+from bitboard import Position
+from move import move_name
+
+# polyglot style record: position hash, move, weight and an unused learn
+# field, big endian so the file sorts the same way as the keys
+RECORD = struct.Struct(">QHHI")
+RECORD_SIZE = RECORD.size
+
+
+class OpeningBook(object):
+    """opening book read from a sorted binary file of (hash, move, weight) records
+
+    the file is memory mapped and probed by binary search, so opening it
+    costs nothing up front and only the pages a probe touches are loaded"""
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "rb")
+        size = os.fstat(self.file.fileno()).st_size
+        # an empty file cannot be mapped
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+        self.count = size // RECORD_SIZE
+
+    def close(self):
+        """unmap and close the book file"""
+        if self.map is not None:
+            self.map.close()
+            self.map = None
+        self.file.close()
+
+    def key_at(self, index):
+        """position hash of the record at an index"""
+        return struct.unpack_from(">Q", self.map, index * RECORD_SIZE)[0]
+
+    def entries(self, key):
+        """list of (move, weight) stored for a position hash"""
+        # binary search for the first record with the key
+        low = 0
+        high = self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self.key_at(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        entries = []
+        while low < self.count:
+            record_key, move, weight, learn = RECORD.unpack_from(self.map, low * RECORD_SIZE)
+            if record_key != key:
+                break
+            entries.append((move, weight))
+            low += 1
+        return entries
+
+    def pick(self, position, generator=None):
+        """book move for a position, None when the position is not in the book
+
+        the heaviest move is picked, or a weighted random one when a
+        random.Random generator is given"""
+        legal = position.legal_moves()
+        # ignore moves that are not legal here, in case two positions share a hash
+        entries = [(move, weight) for move, weight in self.entries(position.hash) if move in legal]
+        if not entries:
+            return None
+        if generator is None:
+            return max(entries, key=lambda entry: entry[1])[0]
+        total = sum(weight for move, weight in entries)
+        if total == 0:
+            return generator.choice(entries)[0]
+        pick = generator.uniform(0, total)
+        for move, weight in entries:
+            pick -= weight
+            if pick <= 0:
+                return move
+        return entries[-1][0]
+
+
+def build_book(lines, path, max_plies=16):
+    """write a book from opening lines given as uci move lists, weighting every
+    move by how often it is played, and return the number of records"""
+    counts = {}
+    for line in lines:
+        position = Position.starting()
+        for name in line[:max_plies]:
+            move = position.parse_move(name)
+            if move is None:
+                break
+            counts[(position.hash, move)] = counts.get((position.hash, move), 0) + 1
+            position.make_move(move)
+
+    # sorted by key so the book can be binary searched
+    with open(path, "wb") as book_file:
+        for (key, move), count in sorted(counts.items()):
+            book_file.write(RECORD.pack(key, move, min(count, 0xFFFF), 0))
+    return len(counts)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="build or probe an opening book")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="build a book from a text file with one line of uci moves per opening")
+    build.add_argument("lines", help="text file of opening lines, e.g. 'e2e4 e7e5 g1f3'")
+    build.add_argument("book", help="book file to write")
+    build.add_argument("--plies", type=int, default=16, help="plies of every line to keep")
+    probe = commands.add_parser("probe", help="list the book moves of a position")
+    probe.add_argument("book", help="book file to read")
+    probe.add_argument("moves", nargs="*", help="uci moves leading to the position from the start")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        with open(args.lines) as lines_file:
+            lines = [line.split() for line in lines_file if line.strip() and not line.startswith("#")]
+        print("{} records written".format(build_book(lines, args.book, args.plies)))
+        return 0
+
+    position = Position.starting()
+    for name in args.moves:
+        move = position.parse_move(name)
+        if move is None:
+            print("illegal move {}".format(name))
+            return 1
+        position.make_move(move)
+    book = OpeningBook(args.book)
+    for move, weight in book.entries(position.hash):
+        print("{} {}".format(move_name(move), weight))
+    book.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,30 +1,23 @@
-import pygame
-from pygame.locals import *
-import random
-
-from piece import Piece
-from utils import Utils
-
-import time
+from background import BackgroundSearch
+from rules import Rules
+from renderer import BoardRenderer
 
 class Chess(object):
-    def __init__(self, screen, pieces_src, square_coords, square_length):
+    def __init__(self, screen, assets, geometry, board_img, bots=None):
         # display surface
         self.screen = screen
-        # create an object of class to show chess pieces on the board
-        self.chess_pieces = Piece(pieces_src, cols=6, rows=2)
-        # store coordinates of the chess board squares
-        self.board_locations = square_coords
-        # length of the side of a chess board square
-        self.square_length = square_length
-        # dictionary to keeping track of player turn
-        self.turn = {"black": 0,
-                     "white": 0}
-
-        # list containing possible moves for the selected piece
-        self.moves = []
-        #
-        self.utils = Utils()
+        # object to show chess pieces on the board
+        self.chess_pieces = assets.pieces("pieces.png")
+        # where the chess board squares are on the screen
+        self.geometry = geometry
+        # draws only the squares that changed since the last frame
+        self.renderer = BoardRenderer(screen, assets, board_img, geometry, self.chess_pieces)
+        # headless rules engine holding the game state
+        self.rules = Rules()
+        # computer players keyed by the colour they play
+        self.bots = bots if bots is not None else {}
+        # the computer players search on background threads so the window keeps running
+        self.engines = {colour: BackgroundSearch(bot) for colour, bot in self.bots.items() if bot is not None}
 
         # mapping of piece names to index of list containing piece coordinates on spritesheet
         self.pieces = {
@@ -42,640 +35,105 @@ class Chess(object):
             "black_queen":  7
         }
 
-        # list containing captured pieces
-        self.captured = []
-        #
-        self.winner = ""
+    def reset(self, fen=None):
+        # a search of the old game is no longer wanted
+        self.stop_engines()
+        # start a new game, from a fen string when one is given
+        self.rules.reset(fen=fen)
 
-        self.reset()
-    
-    def reset(self):
-        # clear moves lists
-        self.moves = []
+    def stop_engines(self):
+        # cancel every search still running
+        for engine in self.engines.values():
+            engine.cancel()
 
-        # randomize player turn
-        x = random.randint(0, 1)
-        if(x == 1):
-            self.turn["black"] = 1
-        elif(x == 0):
-            self.turn["white"] = 1
+    # game state is owned by the rules engine
+    @property
+    def turn(self):
+        return self.rules.turn
 
-        # two dimensonal dictionary containing details about each board location
-        # storage format is [piece_name, currently_selected, x_y_coordinate]
-        self.piece_location = {}
-        x = 0
-        for i in range(97, 105):
-            a = 8
-            y = 0
-            self.piece_location[chr(i)] = {}
-            while a>0:
-                # [piece name, currently selected, board coordinates]
-                self.piece_location[chr(i)][a] = ["", False, [x,y]]
-                a = a - 1
-                y = y + 1
-            x = x + 1
+    @property
+    def moves(self):
+        return self.rules.moves
+
+    @property
+    def piece_location(self):
+        return self.rules.piece_location
+
+    @property
+    def captured(self):
+        return self.rules.captured
 
-        # reset the board
-        for i in range(97, 105):
-            x = 8
-            while x>0:
-                if(x==8):
-                    if(chr(i)=='a' or chr(i)=='h'):
-                        self.piece_location[chr(i)][x][0] = "black_rook"
-                    elif(chr(i)=='b' or chr(i)=='g'):
-                        self.piece_location[chr(i)][x][0] = "black_knight"
-                    elif(chr(i)=='c' or chr(i)=='f'):
-                        self.piece_location[chr(i)][x][0] = "black_bishop"
-                    elif(chr(i)=='d'):
-                        self.piece_location[chr(i)][x][0] = "black_queen"
-                    elif(chr(i)=='e'):
-                        self.piece_location[chr(i)][x][0] = "black_king"
-                elif(x==7):
-                    self.piece_location[chr(i)][x][0] = "black_pawn"
-                elif(x==2):
-                    self.piece_location[chr(i)][x][0] = "white_pawn"
-                elif(x==1):
-                    if(chr(i)=='a' or chr(i)=='h'):
-                        self.piece_location[chr(i)][x][0] = "white_rook"
-                    elif(chr(i)=='b' or chr(i)=='g'):
-                        self.piece_location[chr(i)][x][0] = "white_knight"
-                    elif(chr(i)=='c' or chr(i)=='f'):
-                        self.piece_location[chr(i)][x][0] = "white_bishop"
-                    elif(chr(i)=='d'):
-                        self.piece_location[chr(i)][x][0] = "white_queen"
-                    elif(chr(i)=='e'):
-                        self.piece_location[chr(i)][x][0] = "white_king"
-                x = x - 1
+    @property
+    def winner(self):
+        return self.rules.winner
 
+    @winner.setter
+    def winner(self, value):
+        self.rules.winner = value
 
     # 
     def play_turn(self):
-        # white color
-        white_color = (255, 255, 255)
-        # create fonts for texts
-        small_font = pygame.font.SysFont("comicsansms", 20)
-        # create text to be shown on the game menu
-        if self.turn["black"]:
-            turn_text = small_font.render("Turn: Black", True, white_color)
-        elif self.turn["white"]:
-            turn_text = small_font.render("Turn: White", True, white_color)
-        
-        # show welcome text
-        self.screen.blit(turn_text, 
-                      ((self.screen.get_width() - turn_text.get_width()) // 2,
-                      10))
-        
-        # let player with black piece play
-        if(self.turn["black"]):
-            self.move_piece("black")
-        # let player with white piece play
-        elif(self.turn["white"]):
-            self.move_piece("white")
+        # colour of the player with the turn
+        turn = "black" if self.turn["black"] else "white"
+
+        # let the computer play its colour, players move by clicking
+        engine = self.engines.get(turn)
+        if engine is None or len(self.winner) > 0:
+            return
+        # start thinking on the first frame of the turn, then check back every frame
+        if not engine.thinking:
+            engine.request(self.rules.position)
+            return
+        move = engine.poll(self.rules.position)
+        if move is not None:
+            self.rules.play_move(turn, move)
 
     # method to draw pieces on the chess board
     def draw_pieces(self):
-        transparent_green = (0,194,39,170)
-        transparent_blue = (28,21,212,170)
-
-        # create a transparent surface
-        surface = pygame.Surface((self.square_length, self.square_length), pygame.SRCALPHA)
-        surface.fill(transparent_green)
-
-        surface1 = pygame.Surface((self.square_length, self.square_length), pygame.SRCALPHA)
-        surface1.fill(transparent_blue)
-
-        # loop to change background color of selected piece
+        # piece name and highlight colour of every square
+        squares = {}
+        highlighted = []
         for val in self.piece_location.values():
-            for value in val.values() :
-                # name of the piece in the current location
-                piece_name = value[0]
-                # x, y coordinates of the current piece
-                piece_coord_x, piece_coord_y = value[2]
-
-                # change background color of piece if it is selected
+            for value in val.values():
+                # [piece name, currently selected, board coordinates]
+                x, y = value[2]
+                squares[(x, y)] = (value[0], None)
+                # highlight the selected piece and its moves in the colour of the piece
                 if value[1] and len(value[0]) > 5:
-                    # if the piece selected is a black piece
-                    if value[0][:5] == "black":
-                        self.screen.blit(surface, self.board_locations[piece_coord_x][piece_coord_y])
-                        if len(self.moves) > 0:
-                            for move in self.moves:
-                                x_coord = move[0]
-                                y_coord = move[1]
-                                if x_coord >= 0 and y_coord >= 0 and x_coord < 8 and y_coord < 8:
-                                    self.screen.blit(surface, self.board_locations[x_coord][y_coord])
-                    # if the piece selected is a white piece
-                    elif value[0][:5] == "white":
-                        self.screen.blit(surface1, self.board_locations[piece_coord_x][piece_coord_y])
-                        if len(self.moves) > 0:
-                            for move in self.moves:
-                                x_coord = move[0]
-                                y_coord = move[1]
-                                if x_coord >= 0 and y_coord >= 0 and x_coord < 8 and y_coord < 8:
-                                    self.screen.blit(surface1, self.board_locations[x_coord][y_coord])
-        
-        # draw all chess pieces
-        for val in self.piece_location.values():
-            for value in val.values() :
-                # name of the piece in the current location
-                piece_name = value[0]
-                # x, y coordinates of the current piece
-                piece_coord_x, piece_coord_y = value[2]
-                # check if there is a piece at the square
-                if(len(value[0]) > 1):
-                    # draw piece on the board
-                    self.chess_pieces.draw(self.screen, piece_name, 
-                                            self.board_locations[piece_coord_x][piece_coord_y])
-
-
-    # method to find the possible moves of the selected piece
-    def possible_moves(self, piece_name, piece_coord):
-        # list to store possible moves of the selected piece
-        positions = []
-        # find the possible locations to put a piece
-        if len(piece_name) > 0:
-            # get x, y coordinate
-            x_coord, y_coord = piece_coord
-            # calculate moves for bishop
-            if piece_name[6:] == "bishop":
-                positions = self.diagonal_moves(positions, piece_name, piece_coord)
-            
-            # calculate moves for pawn
-            elif piece_name[6:] == "pawn":
-                # convert list index to dictionary key
-                columnChar = chr(97 + x_coord)
-                rowNo = 8 - y_coord
-
-                # calculate moves for white pawn
-                if piece_name == "black_pawn":
-                    if y_coord + 1 < 8:
-                        # get row in front of black pawn
-                        rowNo = rowNo - 1
-                        front_piece = self.piece_location[columnChar][rowNo][0]
-                
-                        # pawns cannot move when blocked by another another pawn
-                        if(front_piece[6:] != "pawn"):
-                            positions.append([x_coord, y_coord+1])
-                            # black pawns can move two positions ahead for first move
-                            if y_coord < 2:
-                                positions.append([x_coord, y_coord+2])
-
-                        # EM PASSANT
-                        # diagonal to the left
-                        if x_coord - 1 >= 0 and y_coord + 1 < 8:
-                            x = x_coord - 1
-                            y = y_coord + 1
-                            
-                            # convert list index to dictionary key
-                            columnChar = chr(97 + x)
-                            rowNo = 8 - y
-                            to_capture = self.piece_location[columnChar][rowNo]
-
-                            if(to_capture[0][:5] == "white"):
-                                positions.append([x, y])
-                        
-                        # diagonal to the right
-                        if x_coord + 1 < 8  and y_coord + 1 < 8:
-                            x = x_coord + 1
-                            y = y_coord + 1
-
-                            # convert list index to dictionary key
-                            columnChar = chr(97 + x)
-                            rowNo = 8 - y
-                            to_capture = self.piece_location[columnChar][rowNo]
-
-                            if(to_capture[0][:5] == "white"):
-                                positions.append([x, y])
-                        
-                # calculate moves for white pawn
-                elif piece_name == "white_pawn":
-                    if y_coord - 1 >= 0:
-                        # get row in front of black pawn
-                        rowNo = rowNo + 1
-                        front_piece = self.piece_location[columnChar][rowNo][0]
-
-                        # pawns cannot move when blocked by another another pawn
-                        if(front_piece[6:] != "pawn"):
-                            positions.append([x_coord, y_coord-1])
-                            # black pawns can move two positions ahead for first move
-                            if y_coord > 5:
-                                positions.append([x_coord, y_coord-2])
-
-                        # EM PASSANT
-                        # diagonal to the left
-                        if x_coord - 1 >= 0 and y_coord - 1 >= 0:
-                            x = x_coord - 1
-                            y = y_coord - 1
-                            
-                            # convert list index to dictionary key
-                            columnChar = chr(97 + x)
-                            rowNo = 8 - y
-                            to_capture = self.piece_location[columnChar][rowNo]
-
-                            if(to_capture[0][:5] == "black"):
-                                positions.append([x, y])
-
-                            
-                        # diagonal to the right
-                        if x_coord + 1 < 8  and y_coord - 1 >= 0:
-                            x = x_coord + 1
-                            y = y_coord - 1
-
-                            # convert list index to dictionary key
-                            columnChar = chr(97 + x)
-                            rowNo = 8 - y
-                            to_capture = self.piece_location[columnChar][rowNo]
-
-                            if(to_capture[0][:5] == "black"):
-                                positions.append([x, y])
-
-
-            # calculate moves for rook
-            elif piece_name[6:] == "rook":
-                # find linear moves
-                positions = self.linear_moves(positions, piece_name, piece_coord)
-
-            # calculate moves for knight
-            elif piece_name[6:] == "knight":
-                # left positions
-                if(x_coord - 2) >= 0:
-                    if(y_coord - 1) >= 0:
-                        positions.append([x_coord-2, y_coord-1])
-                    if(y_coord + 1) < 8:
-                        positions.append([x_coord-2, y_coord+1])
-                # top positions
-                if(y_coord - 2) >= 0:
-                    if(x_coord - 1) >= 0:
-                        positions.append([x_coord-1, y_coord-2])
-                    if(x_coord + 1) < 8:
-                        positions.append([x_coord+1, y_coord-2])
-                # right positions
-                if(x_coord + 2) < 8:
-                    if(y_coord - 1) >= 0:
-                        positions.append([x_coord+2, y_coord-1])
-                    if(y_coord + 1) < 8:
-                        positions.append([x_coord+2, y_coord+1])
-                # bottom positions
-                if(y_coord + 2) < 8:
-                    if(x_coord - 1) >= 0:
-                        positions.append([x_coord-1, y_coord+2])
-                    if(x_coord + 1) < 8:
-                        positions.append([x_coord+1, y_coord+2])
-
-            # calculate movs for king
-            elif piece_name[6:] == "king":
-                if(y_coord - 1) >= 0:
-                    # top spot
-                    positions.append([x_coord, y_coord-1])
-
-                if(y_coord + 1) < 8:
-                    # bottom spot
-                    positions.append([x_coord, y_coord+1])
-
-                if(x_coord - 1) >= 0:
-                    # left spot
-                    positions.append([x_coord-1, y_coord])
-                    # top left spot
-                    if(y_coord - 1) >= 0:
-                        positions.append([x_coord-1, y_coord-1])
-                    # bottom left spot
-                    if(y_coord + 1) < 8:
-                        positions.append([x_coord-1, y_coord+1])
-                    
-                if(x_coord + 1) < 8:
-                    # right spot
-                    positions.append([x_coord+1, y_coord])
-                    # top right spot
-                    if(y_coord - 1) >= 0:
-                        positions.append([x_coord+1, y_coord-1])
-                    # bottom right spot
-                    if(y_coord + 1) < 8:
-                        positions.append([x_coord+1, y_coord+1])
-                
-            # calculate movs for queen
-            elif piece_name[6:] == "queen":
-                # find diagonal positions
-                positions = self.diagonal_moves(positions, piece_name, piece_coord)
-
-                # find linear moves
-                positions = self.linear_moves(positions, piece_name, piece_coord)
-
-            # list of positions to be removed
-            to_remove = []
-
-            # remove positions that overlap other pieces of the current player
-            for pos in positions:
-                x, y = pos
-
-                # convert list index to dictionary key
-                columnChar = chr(97 + x)
-                rowNo = 8 - y
-
-                # find the pieces to remove
-                des_piece_name = self.piece_location[columnChar][rowNo][0]
-                if(des_piece_name[:5] == piece_name[:5]):
-                    to_remove.append(pos)
-
-            # remove position from positions list
-            for i in to_remove:
-                positions.remove(i)
-
-        # return list containing possible moves for the selected piece
-        return positions
-
-
-    def move_piece(self, turn):
-        # get the coordinates of the square selected on the board
-        square = self.get_selected_square()
-
-        # if a square was selected
-        if square:
-            # get name of piece on the selected square
-            piece_name = square[0]
-            # color of piece on the selected square
-            piece_color = piece_name[:5]
-            # board column character
-            columnChar = square[1]
-            # board row number
-            rowNo = square[2]
-
-            # get x, y coordinates
-            x, y = self.piece_location[columnChar][rowNo][2]
-
-            # if there's a piece on the selected square
-            if(len(piece_name) > 0) and (piece_color == turn):
-                # find possible moves for thr piece
-                self.moves = self.possible_moves(piece_name, [x,y])
-
-            # checkmate mechanism
-            p = self.piece_location[columnChar][rowNo]
-
-            for i in self.moves:
-                if i == [x, y]:
-                    if(p[0][:5] == turn) or len(p[0]) == 0:
-                        self.validate_move([x,y])
-                    else:
-                        self.capture_piece(turn, [columnChar, rowNo], [x,y])
-
-            # only the player with the turn gets to play
-            if(piece_color == turn):
-                # change selection flag from all other pieces
-                for k in self.piece_location.keys():
-                    for key in self.piece_location[k].keys():
-                        self.piece_location[k][key][1] = False
-
-                # change selection flag of the selected piece
-                self.piece_location[columnChar][rowNo][1] = True
-                
-            
-    def get_selected_square(self):
-        # get left event
-        left_click = self.utils.left_click_event()
-
-        # if there's a mouse event
-        if left_click:
-            # get mouse event
-            mouse_event = self.utils.get_mouse_event()
-
-            for i in range(len(self.board_locations)):
-                for j in range(len(self.board_locations)):
-                    rect = pygame.Rect(self.board_locations[i][j][0], self.board_locations[i][j][1], 
-                            self.square_length, self.square_length)
-                    collision = rect.collidepoint(mouse_event[0], mouse_event[1])
-                    if collision:
-                        selected = [rect.x, rect.y]
-                        # find x, y coordinates the selected square
-                        for k in range(len(self.board_locations)):
-                            #
-                            try:
-                                l = None
-                                l = self.board_locations[k].index(selected)
-                                if l != None:
-                                    #reset color of all selected pieces
-                                    for val in self.piece_location.values():
-                                        for value in val.values() :
-                                            # [piece name, currently selected, board coordinates]
-                                            if not value[1]:
-                                                value[1] = False
-
-                                    # get column character and row number of the chess piece
-                                    columnChar = chr(97 + k)
-                                    rowNo = 8 - l
-                                    # get the name of the 
-                                    piece_name = self.piece_location[columnChar][rowNo][0]
-                                    
-                                    return [piece_name, columnChar, rowNo]
-                            except:
-                                pass
-        else:
-            return None
-
-
-    def capture_piece(self, turn, chess_board_coord, piece_coord):
-        # get x, y coordinate of the destination piece
-        x, y = piece_coord
-
-        # get chess board coordinate
-        columnChar, rowNo = chess_board_coord
-
-        p = self.piece_location[columnChar][rowNo]
-        
-        if p[0] == "white_king":
-            self.winner = "Black"
-            print("Black wins")
-        elif p[0] == "black_king":
-            self.winner = "White"
-            print("White wins")
-
-        # add the captured piece to list
-        self.captured.append(p)
-        # move source piece to its destination
-        self.validate_move(piece_coord)
-
-
-    def validate_move(self, destination):
-        desColChar = chr(97 + destination[0])
-        desRowNo = 8 - destination[1]
-
-        for k in self.piece_location.keys():
-            for key in self.piece_location[k].keys():
-                board_piece = self.piece_location[k][key]
-
-                if board_piece[1]:
-                    # unselect the source piece
-                    self.piece_location[k][key][1] = False
-                    # get the name of the source piece
-                    piece_name = self.piece_location[k][key][0]
-                    # move the source piece to the destination piece
-                    self.piece_location[desColChar][desRowNo][0] = piece_name
-                    
-                    src_name = self.piece_location[k][key][0]
-                    # remove source piece from its current position
-                    self.piece_location[k][key][0] = ""
-
-                    # change turn
-                    if(self.turn["black"]):
-                        self.turn["black"] = 0
-                        self.turn["white"] = 1
-                    elif("white"):
-                        self.turn["black"] = 1
-                        self.turn["white"] = 0
-
-                    src_location = k + str(key)
-                    des_location = desColChar + str(desRowNo)
-                    print("{} moved from {} to {}".format(src_name,  src_location, des_location))
-
-
-    # helper function to find diagonal moves
-    def diagonal_moves(self, positions, piece_name, piece_coord):
-        # reset x and y coordinate values
-        x, y = piece_coord
-        # find top left diagonal spots
-        while(True):
-            x = x - 1
-            y = y - 1
-            if(x < 0 or y < 0):
-                break
-            else:
-                positions.append([x,y])
-
-            # convert list index to dictionary key
-            columnChar = chr(97 + x)
-            rowNo = 8 - y
-            p = self.piece_location[columnChar][rowNo]
-
-            # stop finding possible moves if blocked by a piece
-            if len(p[0]) > 0 and piece_name[:5] != p[:5]:
-                break
-
-        # reset x and y coordinate values
-        x, y = piece_coord
-        # find bottom right diagonal spots
-        while(True):
-            x = x + 1
-            y = y + 1
-            if(x > 7 or y > 7):
-                break
-            else:
-                positions.append([x,y])
-
-            # convert list index to dictionary key
-            columnChar = chr(97 + x)
-            rowNo = 8 - y
-            p = self.piece_location[columnChar][rowNo]
-
-            # stop finding possible moves if blocked by a piece
-            if len(p[0]) > 0 and piece_name[:5] != p[:5]:
-                break
-
-        # reset x and y coordinate values
-        x, y = piece_coord
-        # find bottom left diagonal spots
-        while(True):
-            x = x - 1
-            y = y + 1
-            if (x < 0 or y > 7):
-                break
-            else:
-                positions.append([x,y])
-
-            # convert list index to dictionary key
-            columnChar = chr(97 + x)
-            rowNo = 8 - y
-            p = self.piece_location[columnChar][rowNo]
-
-            # stop finding possible moves if blocked by a piece
-            if len(p[0]) > 0 and piece_name[:5] != p[:5]:
-                break
-
-        # reset x and y coordinate values
-        x, y = piece_coord
-        # find top right diagonal spots
-        while(True):
-            x = x + 1
-            y = y - 1
-            if(x > 7 or y < 0):
-                break
-            else:
-                positions.append([x,y])
-
-            # convert list index to dictionary key
-            columnChar = chr(97 + x)
-            rowNo = 8 - y
-            p = self.piece_location[columnChar][rowNo]
-
-            # stop finding possible moves if blocked by a piece
-            if len(p[0]) > 0 and piece_name[:5] != p[:5]:
-                break
-
-        return positions
-    
-
-    # helper function to find horizontal and vertical moves
-    def linear_moves(self, positions, piece_name, piece_coord):
-        # reset x, y coordniate value
-        x, y = piece_coord
-        # horizontal moves to the left
-        while(x > 0):
-            x = x - 1
-            positions.append([x,y])
-
-            # convert list index to dictionary key
-            columnChar = chr(97 + x)
-            rowNo = 8 - y
-            p = self.piece_location[columnChar][rowNo]
-
-            # stop finding possible moves if blocked by a piece
-            if len(p[0]) > 0 and piece_name[:5] != p[:5]:
-                break
-                    
-
-        # reset x, y coordniate value
-        x, y = piece_coord
-        # horizontal moves to the right
-        while(x < 7):
-            x = x + 1
-            positions.append([x,y])
-
-            # convert list index to dictionary key
-            columnChar = chr(97 + x)
-            rowNo = 8 - y
-            p = self.piece_location[columnChar][rowNo]
-
-            # stop finding possible moves if blocked by a piece
-            if len(p[0]) > 0 and piece_name[:5] != p[:5]:
-                break    
-
-        # reset x, y coordniate value
-        x, y = piece_coord
-        # vertical moves upwards
-        while(y > 0):
-            y = y - 1
-            positions.append([x,y])
-
-            # convert list index to dictionary key
-            columnChar = chr(97 + x)
-            rowNo = 8 - y
-            p = self.piece_location[columnChar][rowNo]
-
-            # stop finding possible moves if blocked by a piece
-            if len(p[0]) > 0 and piece_name[:5] != p[:5]:
-                break
-
-        # reset x, y coordniate value
-        x, y = piece_coord
-        # vertical moves downwards
-        while(y < 7):
-            y = y + 1
-            positions.append([x,y])
-
-            # convert list index to dictionary key
-            columnChar = chr(97 + x)
-            rowNo = 8 - y
-            p = self.piece_location[columnChar][rowNo]
-
-            # stop finding possible moves if blocked by a piece
-            if len(p[0]) > 0 and piece_name[:5] != p[:5]:
-                break
-
-
-        return positions
\ No newline at end of file
+                    colour = value[0][:5]
+                    highlighted = [(x, y)] + [(move[0], move[1]) for move in self.moves
+                                              if 0 <= move[0] < 8 and 0 <= move[1] < 8]
+        for square in highlighted:
+            squares[square] = (squares[square][0], colour)
+
+        # text above the board
+        turn_text = "Turn: Black" if self.turn["black"] else "Turn: White"
+        # with how far the computer has got while it thinks
+        engine = self.engines.get("black" if self.turn["black"] else "white")
+        progress = engine.progress() if engine is not None and engine.thinking else None
+        if progress is not None:
+            depth, nodes, line, workers = progress
+            turn_text += "   depth {}  {} nodes  {}".format(depth, nodes, " ".join(line))
+            # how the nodes of the last iteration were shared between the worker processes
+            if len(workers) > 1:
+                turn_text += "  ({})".format(" / ".join(str(count) for count in workers))
+        self.renderer.draw(squares, turn_text)
+
+
+    def move_piece(self, mouse_coords):
+        # colour of the player with the turn
+        turn = "black" if self.turn["black"] else "white"
+        # the computer's pieces cannot be moved by clicking
+        if self.bots.get(turn) is not None:
+            return
+
+        # get the coordinates of the square clicked on the board
+        square = self.geometry.square_at(mouse_coords[0], mouse_coords[1])
+
+        # if a square was clicked
+        if square is not None:
+            # get column character and row number of the square
+            columnChar = chr(97 + square[0])
+            rowNo = 8 - square[1]
+            # let the rules engine select the square or move the selected piece
+            self.rules.select_square(turn, columnChar, rowNo)
@@ -0,0 +1,58 @@
+from bitboard import WHITE, iter_bits
+from pst import SQUARE_SCORES
+
+# numpy is only needed to score batches of positions
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class Evaluator(object):
+    """material plus piece-square table evaluation
+
+    in search use evaluate(), which reads the score the position keeps up to
+    date incrementally. for scoring many positions offline use
+    evaluate_batch(), which multiplies occupancy planes against the tables
+    with numpy in one call"""
+    def __init__(self):
+        # weights of the 12 occupancy planes (white pawn .. white king,
+        # black pawn .. black king) times 64 squares
+        self.weights = None
+        if numpy is not None:
+            self.weights = numpy.array([SQUARE_SCORES[colour][piece_type]
+                                        for colour in range(2)
+                                        for piece_type in range(6)], dtype=numpy.int32).reshape(768)
+
+    def evaluate(self, position):
+        """score from the point of view of the side to move"""
+        return position.score if position.side == WHITE else -position.score
+
+    def evaluate_full(self, position):
+        """score from white's point of view computed from scratch, without the incremental score"""
+        score = 0
+        for square in iter_bits(position.occupied):
+            colour, piece_type = position.squares[square]
+            score += SQUARE_SCORES[colour][piece_type][square]
+        return score
+
+    def planes(self, positions):
+        """(n, 12, 64) uint8 occupancy planes of a batch of positions"""
+        boards = numpy.array([position.bitboards[0] + position.bitboards[1] for position in positions],
+                             dtype="<u8").reshape(len(positions), 12)
+        # every bitboard becomes 8 little endian bytes, then 64 bits with square 0 first
+        return numpy.unpackbits(boards.view(numpy.uint8).reshape(len(positions), 12, 8),
+                                axis=2, bitorder="little")
+
+    def evaluate_planes(self, planes):
+        """scores from white's point of view of a (n, 12, 64) batch of occupancy planes"""
+        return planes.reshape(len(planes), 768).astype(numpy.int32) @ self.weights
+
+    def evaluate_batch(self, positions):
+        """scores from white's point of view of a batch of positions"""
+        if numpy is None:
+            # without numpy fall back on the scalar path
+            return [position.score for position in positions]
+        if not positions:
+            return numpy.zeros(0, dtype=numpy.int32)
+        return self.evaluate_planes(self.planes(positions))
@@ -1,12 +1,20 @@
 import os
 import pygame
 from pygame.locals import *
-from piece import Piece
+from assets import Assets
 from chess import Chess
-from utils import Utils
+from geometry import BoardGeometry
+
+# frames per second while a computer player is moving
+BUSY_FPS = 60
+
 
 class Game:
-    def __init__(self):
+    def __init__(self, bots=None, fen=None):
+        # computer players keyed by the colour they play
+        self.bots = bots
+        # fen string of the position every game starts from, None for the starting position
+        self.fen = fen
         # screen dimensions
         screen_width = 640
         screen_height = 750
@@ -14,8 +22,16 @@ class Game:
         self.menu_showed = False
         # flag to set game loop
         self.running = True
+        # screen drawn last: "menu", "winner", "game" or None to draw it again
+        self.shown = None
+        # coordinates for "Play" button
+        self.start_btn = pygame.Rect(270, 300, 100, 50)
+        # coordinates for play again button
+        self.reset_btn = pygame.Rect(250, 300, 140, 50)
         # base folder for program resources
         self.resources = "res"
+        # fonts, images and rendered text, loaded once
+        self.assets = Assets(self.resources)
  
         # initialize game window
         pygame.display.init()
@@ -44,71 +60,132 @@ class Game:
 
     def start_game(self):
         """Function containing main game loop""" 
-        # chess board offset
-        self.board_offset_x = 0
-        self.board_offset_y = 50
-        self.board_dimensions = (self.board_offset_x, self.board_offset_y)
-        
-        # get location of chess board image
-        board_src = os.path.join(self.resources, "board.png")
         # load the chess board image
-        self.board_img = pygame.image.load(board_src).convert()
-
-        # get the width of a chess board square
-        square_length = self.board_img.get_rect().width // 8
+        self.board_img = self.assets.image("board.png")
 
-        # initialize list that stores all places to put chess pieces on the board
-        self.board_locations = []
+        # chess board 50 pixels from the top, squares an eighth of the board image wide
+        self.geometry = BoardGeometry(0, 50, self.board_img.get_rect().width // 8)
 
-        # calculate coordinates of the each square on the board
-        for x in range(0, 8):
-            self.board_locations.append([])
-            for y in range(0, 8):
-                self.board_locations[x].append([self.board_offset_x+(x*square_length), 
-                                                self.board_offset_y+(y*square_length)])
-
-        # get location of image containing the chess pieces
-        pieces_src = os.path.join(self.resources, "pieces.png")
         # create class object that handles the gameplay logic
-        self.chess = Chess(self.screen, pieces_src, self.board_locations, square_length)
+        self.chess = Chess(self.screen, self.assets, self.geometry, self.board_img, self.bots)
+        if self.fen is not None:
+            self.chess.reset(self.fen)
+
+        # mouse movement and button releases are never handled, so they
+        # should not wake the loop up
+        pygame.event.set_blocked([MOUSEMOTION, MOUSEBUTTONUP])
 
         # game loop
         while self.running:
-            self.clock.tick(5)
-            # poll events
-            for event in pygame.event.get():
-                # get keys pressed
-                key_pressed = pygame.key.get_pressed()
-                # check if the game has been closed by the user
-                if event.type == pygame.QUIT or key_pressed[K_ESCAPE]:
-                    # set flag to break out of the game loop
-                    self.running = False
-                elif key_pressed[K_SPACE]:
-                    self.chess.reset()
-            
-            winner = self.chess.winner
+            self.draw()
 
-            if self.menu_showed == False:
-                self.menu()
-            elif len(winner) > 0:
-                self.declare_winner(winner)
+            # keep going while a computer player has the move, otherwise
+            # sleep until the next event arrives
+            if self.busy():
+                self.clock.tick(BUSY_FPS)
+                events = pygame.event.get()
             else:
-                self.game()
-            
-            
+                events = [pygame.event.wait()] + pygame.event.get()
+
+            for event in events:
+                self.handle_event(event)
+
+        # stop the computer before the window goes
+        self.chess.stop_engines()
+        # call method to stop pygame
+        pygame.quit()
+
+
+    def busy(self):
+        """whether a computer player is about to move"""
+        if not self.menu_showed or len(self.chess.winner) > 0:
+            return False
+        turn = "black" if self.chess.turn["black"] else "white"
+        return self.chess.bots.get(turn) is not None
+
+
+    def handle_event(self, event):
+        """dispatch an event to the handler of its type"""
+        if event.type == QUIT:
+            # set flag to break out of the game loop
+            self.running = False
+        elif event.type == KEYDOWN:
+            self.key_down(event.key)
+        elif event.type == MOUSEBUTTONDOWN and event.button == 1:
+            self.left_click(event.pos)
+        elif event.type in (VIDEOEXPOSE, WINDOWEXPOSED):
+            # the window contents were lost, draw everything again
+            self.shown = None
+            self.chess.renderer.invalidate()
+
+
+    def key_down(self, key):
+        """handle a key press"""
+        if key == K_ESCAPE:
+            self.running = False
+        elif key == K_SPACE:
+            self.chess.reset(self.fen)
+        elif key == K_f:
+            # turn the board around
+            self.geometry.flip()
+            self.chess.renderer.invalidate()
+        elif key == K_RETURN:
+            # enter leaves the menu and the winner screen
+            if self.menu_showed == False:
+                self.menu_showed = True
+            elif len(self.chess.winner) > 0:
+                self.menu_showed = False
+                self.new_game()
 
-            # for testing mechanics of the game
-            #self.game()
-            #self.declare_winner(winner)
 
+    def left_click(self, mouse_coords):
+        """handle a left click on the screen showing"""
+        if self.menu_showed == False:
+            # check if "Play" button was clicked
+            if self.start_btn.collidepoint(mouse_coords):
+                self.menu_showed = True
+        elif len(self.chess.winner) > 0:
+            # check if reset button was clicked
+            if self.reset_btn.collidepoint(mouse_coords):
+                self.menu_showed = False
+            # any click on the winner screen starts a new game
+            self.new_game()
+        else:
+            self.chess.move_piece(mouse_coords)
+
+
+    def new_game(self):
+        """reset the board and the winner"""
+        # reset game, which clears the winner unless the game starts over
+        self.chess.reset(self.fen)
+
+
+    def draw(self):
+        """bring the screen up to date"""
+        # the board pushes only the squares that changed to the display
+        if self.menu_showed and len(self.chess.winner) == 0:
+            self.game()
+
+        winner = self.chess.winner
+        if self.menu_showed == False:
+            screen = "menu"
+        elif len(winner) > 0:
+            screen = "winner"
+        else:
+            screen = "game"
+
+        # menus only change when they are switched to
+        if screen != "game" and screen != self.shown:
+            if screen == "menu":
+                self.menu()
+            else:
+                self.declare_winner(winner)
+            # menus cover the board, so draw all of it when it comes back
+            self.chess.renderer.invalidate()
             # update display
             pygame.display.flip()
-            # update events
-            pygame.event.pump()
+        self.shown = screen
 
-        # call method to stop pygame
-        pygame.quit()
-    
 
     def menu(self):
         """method to show game menu"""
@@ -118,20 +195,15 @@ class Game:
         self.screen.fill(bg_color)
         # black color
         black_color = (0, 0, 0)
-        # coordinates for "Play" button
-        start_btn = pygame.Rect(270, 300, 100, 50)
         # show play button
-        pygame.draw.rect(self.screen, black_color, start_btn)
+        pygame.draw.rect(self.screen, black_color, self.start_btn)
 
         # white color
         white_color = (255, 255, 255)
-        # create fonts for texts
-        big_font = pygame.font.SysFont("comicsansms", 50)
-        small_font = pygame.font.SysFont("comicsansms", 20)
-        # create text to be shown on the game menu
-        welcome_text = big_font.render("Chess", False, black_color)
-        created_by = small_font.render("Created by Sheriff", True, black_color)
-        start_btn_label = small_font.render("Play", True, white_color)
+        # text to be shown on the game menu
+        welcome_text = self.assets.text("Chess", 50, black_color, False)
+        created_by = self.assets.text("Created by Sheriff", 20, black_color)
+        start_btn_label = self.assets.text("Play", 20, white_color)
         
         # show welcome text
         self.screen.blit(welcome_text, 
@@ -143,41 +215,12 @@ class Game:
                       self.screen.get_height() - created_by.get_height() - 100))
         # show text on the Play button
         self.screen.blit(start_btn_label, 
-                      ((start_btn.x + (start_btn.width - start_btn_label.get_width()) // 2, 
-                      start_btn.y + (start_btn.height - start_btn_label.get_height()) // 2)))
-
-        # get pressed keys
-        key_pressed = pygame.key.get_pressed()
-        # 
-        util = Utils()
-
-        # check if left mouse button was clicked
-        if util.left_click_event():
-            # call function to get mouse event
-            mouse_coords = util.get_mouse_event()
-
-            # check if "Play" button was clicked
-            if start_btn.collidepoint(mouse_coords[0], mouse_coords[1]):
-                # change button behavior as it is hovered
-                pygame.draw.rect(self.screen, white_color, start_btn, 3)
-                
-                # change menu flag
-                self.menu_showed = True
-            # check if enter or return key was pressed
-            elif key_pressed[K_RETURN]:
-                self.menu_showed = True
+                      ((self.start_btn.x + (self.start_btn.width - start_btn_label.get_width()) // 2, 
+                      self.start_btn.y + (self.start_btn.height - start_btn_label.get_height()) // 2)))
 
 
     def game(self):
-        # background color
-        color = (0,0,0)
-        # set backgound color
-        self.screen.fill(color)
-        
-        # show the chess board
-        self.screen.blit(self.board_img, self.board_dimensions)
-
-        # call self.chess. something
+        # start the computer thinking or play the move it found, without waiting for it
         self.chess.play_turn()
         # draw pieces on the chess board
         self.chess.draw_pieces()
@@ -190,24 +233,18 @@ class Game:
         self.screen.fill(bg_color)
         # black color
         black_color = (0, 0, 0)
-        # coordinates for play again button
-        reset_btn = pygame.Rect(250, 300, 140, 50)
         # show reset button
-        pygame.draw.rect(self.screen, black_color, reset_btn)
+        pygame.draw.rect(self.screen, black_color, self.reset_btn)
 
         # white color
         white_color = (255, 255, 255)
-        # create fonts for texts
-        big_font = pygame.font.SysFont("comicsansms", 50)
-        small_font = pygame.font.SysFont("comicsansms", 20)
-
         # text to show winner
-        text = winner + " wins!" 
-        winner_text = big_font.render(text, False, black_color)
+        text = winner + " wins!" if winner != "Draw" else "Draw!"
+        winner_text = self.assets.text(text, 50, black_color, False)
 
-        # create text to be shown on the reset button
+        # text to be shown on the reset button
         reset_label = "Play Again"
-        reset_btn_label = small_font.render(reset_label, True, white_color)
+        reset_btn_label = self.assets.text(reset_label, 20, white_color)
 
         # show winner text
         self.screen.blit(winner_text, 
@@ -216,30 +253,5 @@ class Game:
         
         # show text on the reset button
         self.screen.blit(reset_btn_label, 
-                      ((reset_btn.x + (reset_btn.width - reset_btn_label.get_width()) // 2, 
-                      reset_btn.y + (reset_btn.height - reset_btn_label.get_height()) // 2)))
-
-        # get pressed keys
-        key_pressed = pygame.key.get_pressed()
-        # 
-        util = Utils()
-
-        # check if left mouse button was clicked
-        if util.left_click_event():
-            # call function to get mouse event
-            mouse_coords = util.get_mouse_event()
-
-            # check if reset button was clicked
-            if reset_btn.collidepoint(mouse_coords[0], mouse_coords[1]):
-                # change button behavior as it is hovered
-                pygame.draw.rect(self.screen, white_color, reset_btn, 3)
-                
-                # change menu flag
-                self.menu_showed = False
-            # check if enter or return key was pressed
-            elif key_pressed[K_RETURN]:
-                self.menu_showed = False
-            # reset game
-            self.chess.reset()
-            # clear winner
-            self.chess.winner = ""
\ No newline at end of file
+                      ((self.reset_btn.x + (self.reset_btn.width - reset_btn_label.get_width()) // 2, 
+                      self.reset_btn.y + (self.reset_btn.height - reset_btn_label.get_height()) // 2)))
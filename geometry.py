@@ -0,0 +1,52 @@
+import pygame
+
+
+class BoardGeometry(object):
+    """where the board squares are on the screen
+
+    squares use the board x, y coordinates of the rest of the game: x is
+    the file (0 for a) and y counts down from rank 8 (0 for rank 8). when
+    the board is flipped rank 1 is drawn at the top"""
+    def __init__(self, offset_x, offset_y, square_length, flipped=False):
+        # pixel position of the top left corner of the board
+        self.offset_x = offset_x
+        self.offset_y = offset_y
+        # length of the side of a chess board square
+        self.square_length = square_length
+        # whether black is at the bottom of the screen
+        self.flipped = flipped
+
+    @property
+    def offset(self):
+        """pixel position of the top left corner of the board"""
+        return (self.offset_x, self.offset_y)
+
+    @property
+    def board_length(self):
+        """length of the side of the board in pixels"""
+        return 8 * self.square_length
+
+    def flip(self):
+        """turn the board around"""
+        self.flipped = not self.flipped
+
+    def square_at(self, pixel_x, pixel_y):
+        """board x, y coordinates of the square under a pixel, None off the board"""
+        column = (pixel_x - self.offset_x) // self.square_length
+        row = (pixel_y - self.offset_y) // self.square_length
+        if not (0 <= column < 8 and 0 <= row < 8):
+            return None
+        if self.flipped:
+            return 7 - column, 7 - row
+        return column, row
+
+    def square_origin(self, x, y):
+        """pixel position of the top left corner of a square"""
+        if self.flipped:
+            x = 7 - x
+            y = 7 - y
+        return (self.offset_x + x * self.square_length, self.offset_y + y * self.square_length)
+
+    def square_rect(self, x, y):
+        """rectangle covering a square on the screen"""
+        return pygame.Rect(self.square_origin(x, y), (self.square_length, self.square_length))
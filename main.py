@@ -1,5 +1,44 @@
+import argparse
+
+from bitboard import Position
+from book import OpeningBook
 from game import Game
+from tablebase import Tablebases
+from search import Search
+from parallel import ParallelSearch
 
 if __name__=="__main__":
-    game = Game()
+    parser = argparse.ArgumentParser(description="play chess")
+    parser.add_argument("--bot", choices=["white", "black", "both"], action="append", default=[],
+                        help="colour played by the computer, may be given twice")
+    parser.add_argument("--movetime", type=float, default=1.0, help="seconds the computer thinks per move")
+    parser.add_argument("--nodes", type=int, default=None, help="nodes the computer searches per move")
+    parser.add_argument("--workers", type=int, default=1, help="processes the computer searches with")
+    parser.add_argument("--book", default=None, help="opening book file the computer plays from")
+    parser.add_argument("--tablebases", default=None, help="directory of endgame tables the computer plays from")
+    parser.add_argument("--fen", default=None, help="position to start every game from")
+    args = parser.parse_args()
+    if args.fen is not None:
+        # report a bad fen before opening the window
+        try:
+            Position.from_fen(args.fen)
+        except ValueError as error:
+            parser.error(str(error))
+
+    # the book is memory mapped once and shared by both computer players
+    book = OpeningBook(args.book) if args.book else None
+    tablebases = Tablebases(args.tablebases) if args.tablebases else None
+
+    # create a computer player for every requested colour
+    bots = {}
+    for colour in args.bot:
+        for c in (["white", "black"] if colour == "both" else [colour]):
+            if args.workers > 1:
+                bots[c] = ParallelSearch(args.workers, time_limit=args.movetime, node_limit=args.nodes,
+                                         book=book, tablebases=tablebases)
+            else:
+                bots[c] = Search(time_limit=args.movetime, node_limit=args.nodes, book=book,
+                                 tablebases=tablebases)
+
+    game = Game(bots, args.fen)
     game.start_game()
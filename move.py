@@ -0,0 +1,95 @@
+# compact move encoding
+#
+# a move is a 16 bit int: bits 0-5 hold the from square, bits 6-11 the to
+# square and bits 12-15 the flags below. 0 (a1 to a1) is never a legal move
+# and is used for "no move"
+
+from array import array
+
+# move flags
+QUIET = 0
+DOUBLE_PUSH = 1
+KING_CASTLE = 2
+QUEEN_CASTLE = 3
+CAPTURE = 4
+EP_CAPTURE = 5
+# promotions have bit 3 set and the promotion piece in bits 0-1,
+# capturing promotions also have the capture bit set
+PROMOTION = 8
+PROMOTION_CAPTURE = 12
+
+# the flags already shifted into place, for building moves in the generator
+CAPTURE_BITS = CAPTURE << 12
+PROMOTION_BITS = PROMOTION << 12
+
+# no move
+NULL_MOVE = 0
+
+# most legal moves any chess position has is 218
+MAX_MOVES = 256
+# deepest ply a search or perft keeps a move buffer for
+MAX_PLY = 128
+
+# letters of the promotion pieces in bits 0-1 of the flags
+PROMOTION_LETTERS = "nbrq"
+
+
+def encode_move(from_sq, to_sq, flags=QUIET):
+    """pack a move into 16 bits"""
+    return from_sq | (to_sq << 6) | (flags << 12)
+
+
+def move_from(move):
+    """from square of a move"""
+    return move & 63
+
+
+def move_to(move):
+    """to square of a move"""
+    return (move >> 6) & 63
+
+
+def move_flags(move):
+    """flags of a move"""
+    return move >> 12
+
+
+def is_capture(move):
+    """whether a move captures, including en passant and capturing promotions"""
+    return move & CAPTURE_BITS != 0
+
+
+def is_promotion(move):
+    """whether a move promotes a pawn"""
+    return move & PROMOTION_BITS != 0
+
+
+def promotion_piece(move):
+    """piece type a promotion promotes to (knight = 1 up to queen = 4)"""
+    return ((move >> 12) & 3) + 1
+
+
+def promotion_flags(piece_type, capture=False):
+    """flags of a promotion to a piece type"""
+    return (PROMOTION_CAPTURE if capture else PROMOTION) | (piece_type - 1)
+
+
+def move_name(move):
+    """long algebraic (uci) name of a move, e.g. 'e2e4' or 'e7e8q'"""
+    from_sq = move & 63
+    to_sq = (move >> 6) & 63
+    name = (chr(97 + (from_sq & 7)) + str((from_sq >> 3) + 1) +
+            chr(97 + (to_sq & 7)) + str((to_sq >> 3) + 1))
+    if move & PROMOTION_BITS:
+        name += PROMOTION_LETTERS[(move >> 12) & 3]
+    return name
+
+
+def new_move_buffer():
+    """preallocated buffer holding the moves of one position"""
+    return array("H", bytes(2 * MAX_MOVES))
+
+
+def new_move_buffers(plies=MAX_PLY):
+    """one preallocated move buffer per ply, reused for every node at that ply"""
+    return [new_move_buffer() for ply in range(plies)]
@@ -0,0 +1,113 @@
+# move ordering for alpha-beta
+#
+# the search cuts off fastest when the best move is tried first. moves
+# are sorted by a score: the hash move of the transposition table, then
+# captures and promotions by mvv-lva (most valuable victim, least valuable
+# attacker), then the two killer moves of the ply, then quiet moves by
+# how often they caused cutoffs before (history heuristic)
+
+from array import array
+
+from move import MAX_PLY, CAPTURE_BITS, PROMOTION_BITS, EP_CAPTURE, is_promotion, promotion_piece
+
+# sort scores of each kind of move, far enough apart that the kinds never mix
+HASH_SCORE = 1 << 30
+CAPTURE_SCORE = 1 << 28
+KILLER_SCORES = (1 << 27, (1 << 27) - 1)
+# history scores are halved once any of them grows past this, so they stay below the killers
+HISTORY_LIMIT = 1 << 26
+# history scores are divided by this at the start of every search, so old cutoffs fade
+HISTORY_AGING = 8
+
+# mvv-lva weights of the piece types: pawn, knight, bishop, rook, queen, king
+VICTIM_VALUES = [1, 3, 3, 5, 9, 0]
+ATTACKER_VALUES = [1, 3, 3, 5, 9, 10]
+
+
+def mvv_lva(position, move):
+    """sort score of a capture or promotion: most valuable victim first, then least valuable attacker"""
+    score = CAPTURE_SCORE
+    if move & CAPTURE_BITS:
+        # en passant captures a pawn from an empty square
+        victim = 0 if (move >> 12) == EP_CAPTURE else position.squares[(move >> 6) & 63][1]
+        score += VICTIM_VALUES[victim] * 16 - ATTACKER_VALUES[position.squares[move & 63][1]]
+    if is_promotion(move):
+        score += VICTIM_VALUES[promotion_piece(move)] * 16
+    return score
+
+
+class MoveOrderer(object):
+    """sorts the moves of a node and learns from the moves that caused cutoffs"""
+    def __init__(self):
+        # two quiet moves per ply that recently caused a cutoff there
+        self.killers = [[0, 0] for _ in range(MAX_PLY)]
+        # cutoff scores of quiet moves per colour, indexed by the from and to squares of the move, move & 0xFFF
+        self.history = [array("i", bytes(4 * 64 * 64)) for _ in range(2)]
+
+        # statistics of the current search
+        # nodes that failed high
+        self.cutoffs = 0
+        # nodes that failed high on the first move tried
+        self.first_move_cutoffs = 0
+
+    @property
+    def first_move_cutoff_rate(self):
+        """share of the cutoffs caused by the first move tried, 0 to 1"""
+        return self.first_move_cutoffs / self.cutoffs if self.cutoffs else 0.0
+
+    def new_search(self):
+        """forget the killers and statistics and age the history of the last search"""
+        for killers in self.killers:
+            killers[0] = killers[1] = 0
+        for history in self.history:
+            for i in range(len(history)):
+                history[i] //= HISTORY_AGING
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
+
+    def clear(self):
+        """forget everything learnt, e.g. for a new game"""
+        for history in self.history:
+            for i in range(len(history)):
+                history[i] = 0
+        self.new_search()
+
+    def order(self, position, buffer, count, ply, hash_move=None):
+        """the first count moves of a buffer, best first"""
+        # runs at every interior node of the search, so the lookups are kept local
+        killer1, killer2 = self.killers[ply]
+        history = self.history[position.side]
+        scored = []
+        for i in range(count):
+            move = buffer[i]
+            if move == hash_move:
+                score = HASH_SCORE
+            elif move & (CAPTURE_BITS | PROMOTION_BITS):
+                score = mvv_lva(position, move)
+            elif move == killer1:
+                score = KILLER_SCORES[0]
+            elif move == killer2:
+                score = KILLER_SCORES[1]
+            else:
+                score = history[move & 0xFFF]
+            scored.append((score, move))
+        scored.sort(reverse=True)
+        return [move for _, move in scored]
+
+    def cutoff(self, position, move, ply, depth, index):
+        """record that a move, the index-th one tried, failed high at a node"""
+        self.cutoffs += 1
+        if index == 0:
+            self.first_move_cutoffs += 1
+        # captures and promotions are already sorted well by mvv-lva
+        if move & (CAPTURE_BITS | PROMOTION_BITS):
+            return
+        killers = self.killers[ply]
+        if killers[0] != move:
+            killers[1] = killers[0]
+            killers[0] = move
+        history = self.history[position.side]
+        history[move & 0xFFF] += depth * depth
+        if history[move & 0xFFF] > HISTORY_LIMIT:
+            for i in range(len(history)):
+                history[i] //= 2
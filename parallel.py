@@ -0,0 +1,256 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+from search import Search, SearchAborted, MATE, INFINITY
+from tablebase import Tablebases
+
+# how often the parent checks its stop event while waiting on the workers, in seconds
+POLL_INTERVAL = 0.05
+
+# search object of a worker process, kept between tasks so its
+# transposition table carries over from one iteration to the next
+_worker_search = None
+# search the worker last took part in, to start its statistics afresh for a new one
+_worker_search_id = None
+
+
+def worker_context():
+    """multiprocessing context the worker processes are started with"""
+    # workers are started by a clean server process rather than forked from
+    # this one, which may have a window, a search thread or fonts being
+    # loaded. windows has no server and spawns every worker afresh instead
+    if "forkserver" not in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("spawn")
+    context = multiprocessing.get_context("forkserver")
+    # the server imports the search, not the main script of the program
+    context.set_forkserver_preload(["parallel"])
+    return context
+
+
+def _init_worker(hash_mb, tablebase_dir, stop_event, options):
+    """create the search object of a worker process"""
+    global _worker_search
+    # every worker maps the endgame tables itself
+    tablebases = Tablebases(tablebase_dir) if tablebase_dir is not None else None
+    _worker_search = Search(hash_mb=hash_mb, tablebases=tablebases, **options)
+    # shared with the parent process, which sets it to cancel a search
+    _worker_search.stop_event = stop_event
+
+
+def _search_move(search_id, position, move, depth, alpha, deadline, node_limit):
+    """search one root move in a worker process, only as far as needed to
+    show whether it beats alpha
+
+    returns (pid, nodes, seldepth, move, score), with move None when the
+    budget ran out or the search was stopped first"""
+    global _worker_search_id
+    search = _worker_search
+    # age the table, killers and history once per search, like Search.search does
+    if search_id != _worker_search_id:
+        _worker_search_id = search_id
+        search.table.new_search()
+        if search.ordering is not None:
+            search.ordering.new_search()
+    search.nodes = 0
+    search.seldepth = 0
+    search.best_move = None
+    search.node_limit = node_limit
+    search.deadline = None
+    # deadlines cross process boundaries as wall clock times
+    if deadline is not None:
+        search.deadline = time.perf_counter() + (deadline - time.time())
+    try:
+        # a zero window shows whether the move beats alpha, and only a move
+        # that does is searched again for its exact score
+        if alpha > -INFINITY:
+            best_move, score = search.search_root(position, depth, [move], alpha, alpha + 1)
+        if alpha == -INFINITY or score > alpha:
+            best_move, score = search.search_root(position, depth, [move], alpha, INFINITY)
+    except SearchAborted:
+        return os.getpid(), search.nodes, search.seldepth, None, 0
+    return os.getpid(), search.nodes, search.seldepth, best_move, score
+
+
+class ParallelSearch(object):
+    """iterative deepening search that spreads the root moves of every
+    iteration over worker processes
+
+    the best move of the last iteration is searched first to get a score
+    to beat. the other moves are then handed out one at a time to whichever
+    worker is free, each only searched far enough to show whether it beats
+    the best score found so far"""
+    def __init__(self, workers=None, max_depth=64, time_limit=None, node_limit=None, hash_mb=16, book=None,
+                 tablebases=None, **options):
+        # number of worker processes, by default one per cpu
+        self.workers = workers or os.cpu_count() or 1
+        # deepest iteration of iterative deepening
+        self.max_depth = max_depth
+        # seconds allowed per move, None for no time limit
+        self.time_limit = time_limit
+        # nodes allowed per move over all workers, None for no node limit
+        self.node_limit = node_limit
+        # transposition table size of every worker
+        self.hash_mb = hash_mb
+        # opening book consulted before searching, None to always search
+        self.book = book
+        # endgame tables of the workers, None to search small endgames
+        self.tablebases = tablebases
+        # other Search switches of the workers, e.g. lmr=False
+        self.options = options
+        # move ordering lives in the worker processes
+        self.ordering = None
+        # pool of worker processes, started on the first search
+        self.executor = None
+        # threading.Event that stops the search when set, e.g. from another thread
+        self.stop_event = None
+        # called with the search after every completed iteration, e.g. to report progress
+        self.on_iteration = None
+        # set to make the workers drop what they are searching, created with the pool
+        self.worker_stop = None
+        # counts searches so workers know when a new one starts
+        self.search_id = 0
+
+        # statistics of the last search
+        self.start_time = 0.0
+        self.nodes = 0
+        self.seldepth = 0
+        self.depth = 0
+        self.score = 0
+        self.best_move = None
+        # nodes searched by every worker, keyed by worker index
+        self.worker_nodes = {}
+        # worker process ids in the order they first reported back
+        self.worker_pids = []
+
+    def start(self):
+        """start the worker processes"""
+        if self.executor is None:
+            context = worker_context()
+            self.worker_stop = context.Event()
+            tablebase_dir = self.tablebases.directory if self.tablebases is not None else None
+            self.executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=context,
+                                                initializer=_init_worker,
+                                                initargs=(self.hash_mb, tablebase_dir, self.worker_stop,
+                                                          self.options))
+
+    def close(self):
+        """stop the worker processes"""
+        if self.executor is not None:
+            self.worker_stop.set()
+            self.executor.shutdown(cancel_futures=True)
+            self.executor = None
+            self.worker_stop.clear()
+
+    def count_nodes(self, pid, nodes):
+        """add nodes to the count of the worker with a process id"""
+        if pid not in self.worker_pids:
+            self.worker_pids.append(pid)
+        worker = self.worker_pids.index(pid)
+        self.worker_nodes[worker] = self.worker_nodes.get(worker, 0) + nodes
+        self.nodes += nodes
+
+    def stopped(self):
+        """whether the stop event has been set"""
+        return self.stop_event is not None and self.stop_event.is_set()
+
+    def search_iteration(self, root, moves, depth, deadline):
+        """search every root move to a depth and return (best move, score,
+        complete). an unfinished iteration still returns the best of the moves
+        it did search, or None when not even the first one finished"""
+        # the best move so far first, alone, for a score the others have to beat
+        first = self.best_move if self.best_move in moves else moves[0]
+        queue = [first] + [move for move in moves if move != first]
+        best_move = None
+        alpha = -INFINITY
+        pending = set()
+        complete = True
+
+        while queue or pending:
+            # keep every worker busy, but the first move runs on its own
+            while queue and complete and len(pending) < self.workers and (best_move is not None or not pending):
+                # a task may use all of the budget left, the total is enforced here
+                node_limit = None
+                if self.node_limit is not None:
+                    node_limit = max(1, self.node_limit - self.nodes)
+                pending.add(self.executor.submit(_search_move, self.search_id, root, queue.pop(0), depth,
+                                                 alpha, deadline, node_limit))
+
+            done, pending = wait(pending, timeout=POLL_INTERVAL, return_when=FIRST_COMPLETED)
+            for future in done:
+                pid, nodes, seldepth, move, score = future.result()
+                self.count_nodes(pid, nodes)
+                self.seldepth = max(self.seldepth, seldepth)
+                if move is None:
+                    complete = False
+                elif best_move is None or score > alpha:
+                    best_move = move
+                    alpha = score
+            # moves still to search when the budget runs out leave the iteration unfinished
+            if complete and (queue or pending):
+                if self.node_limit is not None and self.nodes >= self.node_limit:
+                    complete = False
+                if self.stopped():
+                    complete = False
+            if not complete:
+                # nothing more is handed out, and the workers drop what they hold
+                queue = []
+                self.worker_stop.set()
+
+        self.worker_stop.clear()
+        return best_move, alpha, complete
+
+    def search(self, position):
+        """iterative deepening search returning the best move found within the budget"""
+        self.start()
+        self.search_id += 1
+        self.start_time = time.perf_counter()
+        self.nodes = 0
+        self.seldepth = 0
+        self.depth = 0
+        self.score = 0
+        self.best_move = None
+        self.worker_nodes = {}
+        if self.book is not None:
+            self.best_move = self.book.pick(position)
+            if self.best_move is not None:
+                return self.best_move
+        deadline = None
+        if self.time_limit is not None:
+            deadline = time.time() + self.time_limit
+
+        # workers get a copy of the position with the moves that led to it
+        root = position.copy()
+        moves = root.legal_moves()
+        if not moves:
+            return None
+
+        for depth in range(1, self.max_depth + 1):
+            if self.node_limit is not None and self.nodes >= self.node_limit:
+                break
+            best_move, score, complete = self.search_iteration(root, moves, depth, deadline)
+            if best_move is None:
+                break
+            # the moves of an unfinished iteration that were searched were searched
+            # deeper than the last one, so the best of them is kept
+            self.best_move = best_move
+            self.score = score
+            if not complete:
+                break
+            # keep the result of every completed iteration
+            self.depth = depth
+            if self.on_iteration is not None:
+                self.on_iteration(self)
+            if abs(score) >= MATE - self.max_depth:
+                break
+
+        # fall back on any move if not even the first iteration completed
+        if self.best_move is None:
+            self.best_move = moves[0]
+        return self.best_move
+
+    def principal_variation(self, position):
+        """best line of the last search, only its first move since the
+        transposition tables live in the worker processes"""
+        return [self.best_move] if self.best_move is not None else []
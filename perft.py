@@ -0,0 +1,159 @@
+import argparse
+import json
+import sys
+import time
+
+from bitboard import Position, START_FEN
+from move import move_name, new_move_buffers
+
+# one move buffer per ply, reused by every node at that ply
+BUFFERS = new_move_buffers()
+
+# standard perft reference positions with their expected node counts per depth
+# (index 0 is depth 1)
+REFERENCE_POSITIONS = [
+    {
+        "name": "startpos",
+        "fen": START_FEN,
+        "nodes": [20, 400, 8902, 197281, 4865609],
+    },
+    {
+        "name": "kiwipete",
+        "fen": "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+        "nodes": [48, 2039, 97862, 4085603],
+    },
+    {
+        "name": "position3",
+        "fen": "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+        "nodes": [14, 191, 2812, 43238, 674624],
+    },
+    {
+        "name": "position4",
+        "fen": "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+        "nodes": [6, 264, 9467, 422333],
+    },
+    {
+        "name": "position5",
+        "fen": "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8",
+        "nodes": [44, 1486, 62379, 2103487],
+    },
+    {
+        "name": "position6",
+        "fen": "r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10",
+        "nodes": [46, 2079, 89890, 3894594],
+    },
+]
+
+
+def perft(position, depth, ply=0):
+    """number of leaf nodes of the move tree of a position at a depth"""
+    if depth == 0:
+        return 1
+    buffer = BUFFERS[ply]
+    count = position.generate_moves(buffer)
+    # the moves themselves are the leaves one ply from the end
+    if depth == 1:
+        return count
+    nodes = 0
+    for i in range(count):
+        position.make_move(buffer[i])
+        nodes += perft(position, depth - 1, ply + 1)
+        position.unmake_move()
+    return nodes
+
+
+def divide(position, depth):
+    """node count below every root move, useful to track down move generation bugs"""
+    counts = {}
+    for move in position.legal_moves():
+        position.make_move(move)
+        counts[move_name(move)] = perft(position, depth - 1, 1)
+        position.unmake_move()
+    return counts
+
+
+def run(name, fen, depth, expected=None):
+    """run perft for depths 1..depth and return one timing record per depth"""
+    position = Position.from_fen(fen)
+    records = []
+    for d in range(1, depth + 1):
+        start = time.perf_counter()
+        nodes = perft(position, d)
+        seconds = time.perf_counter() - start
+        record = {
+            "name": name,
+            "fen": fen,
+            "depth": d,
+            "nodes": nodes,
+            "seconds": round(seconds, 6),
+            "nps": int(nodes / seconds) if seconds > 0 else 0,
+        }
+        # compare against the reference count when there is one
+        if expected is not None and d <= len(expected):
+            record["expected"] = expected[d - 1]
+            record["ok"] = nodes == expected[d - 1]
+        records.append(record)
+    return records
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="count move generation nodes and measure throughput")
+    parser.add_argument("--fen", default=START_FEN, help="position to search (default: start position)")
+    parser.add_argument("--depth", type=int, default=3, help="maximum depth to search")
+    parser.add_argument("--suite", action="store_true",
+                        help="run every reference position and compare with the expected counts")
+    parser.add_argument("--divide", action="store_true", help="print the node count below every root move")
+    parser.add_argument("--json", action="store_true", help="print machine readable json instead of text")
+    args = parser.parse_args(argv)
+    # report a bad fen before searching
+    try:
+        Position.from_fen(args.fen)
+    except ValueError as error:
+        parser.error(str(error))
+
+    if args.divide:
+        counts = divide(Position.from_fen(args.fen), args.depth)
+        for move in sorted(counts):
+            print("{}: {}".format(move, counts[move]))
+        print("total: {}".format(sum(counts.values())))
+        return 0
+
+    # collect the records of every position to search
+    records = []
+    if args.suite:
+        for reference in REFERENCE_POSITIONS:
+            depth = min(args.depth, len(reference["nodes"]))
+            records.extend(run(reference["name"], reference["fen"], depth, reference["nodes"]))
+    else:
+        expected = None
+        for reference in REFERENCE_POSITIONS:
+            if reference["fen"] == args.fen:
+                expected = reference["nodes"]
+        records.extend(run("custom", args.fen, args.depth, expected))
+
+    failed = [record for record in records if record.get("ok") is False]
+
+    if args.json:
+        total_nodes = sum(record["nodes"] for record in records)
+        total_seconds = sum(record["seconds"] for record in records)
+        print(json.dumps({
+            "records": records,
+            "total_nodes": total_nodes,
+            "total_seconds": round(total_seconds, 6),
+            "nps": int(total_nodes / total_seconds) if total_seconds > 0 else 0,
+            "failed": len(failed),
+        }, indent=2))
+    else:
+        for record in records:
+            status = ""
+            if "expected" in record:
+                status = "ok" if record["ok"] else "FAIL (expected {})".format(record["expected"])
+            print("{:<10} depth {:>2} nodes {:>10} time {:>9.3f}s nps {:>9} {}".format(
+                record["name"], record["depth"], record["nodes"], record["seconds"], record["nps"], status))
+
+    # non zero exit status when any count does not match its reference
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,220 @@
+import argparse
+import itertools
+import json
+import os
+import re
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from bitboard import Position
+from move import is_capture, is_promotion
+
+# movetext tokens: comments, variations, annotations, results, move numbers and moves
+TOKEN = re.compile(r"\{[^}]*\}?|;.*|\(|\)|\$\d+|1-0|0-1|1/2-1/2|\*|\d+\.+|[^\s{}();]+")
+TAG = re.compile(r'\[\s*(\w+)\s+"((?:[^"\\]|\\.)*)"\s*\]')
+RESULTS = ("1-0", "0-1", "1/2-1/2", "*")
+
+
+class PgnGame(object):
+    """tags and san moves of one game of a pgn file"""
+    def __init__(self, index, tags, moves, result):
+        # position of the game in its file, counting from 0
+        self.index = index
+        # tag pairs like Event, White and FEN
+        self.tags = tags
+        # moves in standard algebraic notation
+        self.moves = moves
+        # result token ending the movetext, None when it was missing
+        self.result = result
+
+
+def read_games(lines):
+    """yield the games of pgn text given as an iterable of lines, e.g. an open
+    file, one at a time so memory use does not grow with the file"""
+    index = 0
+    tags = {}
+    moves = []
+    # whether the current game has movetext
+    started = False
+    # depth of nested variations being skipped
+    depth = 0
+    in_comment = False
+
+    for line in lines:
+        if in_comment:
+            end = line.find("}")
+            if end < 0:
+                continue
+            line = line[end + 1:]
+            in_comment = False
+        elif line.startswith("%"):
+            # escaped line
+            continue
+
+        stripped = line.strip()
+        if stripped.startswith("[") and depth == 0:
+            match = TAG.match(stripped)
+            if match:
+                # tags after movetext start the next game
+                if started:
+                    yield PgnGame(index, tags, moves, None)
+                    index += 1
+                    tags = {}
+                    moves = []
+                    started = False
+                tags[match.group(1)] = match.group(2).replace('\\"', '"').replace("\\\\", "\\")
+                continue
+
+        for token in TOKEN.findall(line):
+            first = token[0]
+            if first == "{":
+                if not token.endswith("}"):
+                    in_comment = True
+                continue
+            if first == ";":
+                break
+            if first == "(":
+                depth += 1
+            elif first == ")":
+                depth = max(0, depth - 1)
+            elif depth > 0 or first == "$" or (first.isdigit() and token.endswith(".")):
+                continue
+            elif token in RESULTS:
+                yield PgnGame(index, tags, moves, token)
+                index += 1
+                tags = {}
+                moves = []
+                started = False
+                depth = 0
+            else:
+                moves.append(token)
+                started = True
+
+    if started or tags:
+        yield PgnGame(index, tags, moves, None)
+
+
+def replay_game(game):
+    """play the moves of a game on the board and return what happened as a dict"""
+    result = {
+        "game": game.index,
+        "white": game.tags.get("White", "?"),
+        "black": game.tags.get("Black", "?"),
+        "result": game.result or game.tags.get("Result", "*"),
+        "plies": 0,
+        "legal": True,
+        "error": None,
+        "captures": 0,
+        "checks": 0,
+        "promotions": 0,
+        "checkmate": False,
+        "fen": None,
+    }
+    try:
+        position = Position.from_fen(game.tags["FEN"]) if "FEN" in game.tags else Position.starting()
+    except ValueError as error:
+        result["legal"] = False
+        result["error"] = "bad FEN tag: {}".format(error)
+        return result
+
+    for san in game.moves:
+        move = position.parse_san(san)
+        if move is None:
+            result["legal"] = False
+            result["error"] = "illegal move {} at ply {}".format(san, result["plies"] + 1)
+            break
+        if is_capture(move):
+            result["captures"] += 1
+        if is_promotion(move):
+            result["promotions"] += 1
+        position.make_move(move)
+        result["plies"] += 1
+        if position.in_check():
+            result["checks"] += 1
+
+    result["checkmate"] = position.is_checkmate()
+    result["fen"] = position.to_fen()
+    return result
+
+
+def _replay_chunk(games):
+    """replay a list of games in a worker process"""
+    return [replay_game(game) for game in games]
+
+
+def chunks(games, size):
+    """group an iterable of games into lists of at most size games"""
+    chunk = []
+    for game in games:
+        chunk.append(game)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def replay(games, workers=None, chunk_size=64):
+    """yield the replay results of an iterable of games in order, replaying
+    chunks of games in a process pool with a bounded number of chunks in
+    flight so the games are read only as fast as they are replayed"""
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # keep every worker busy with one chunk queued behind it
+        limit = 2 * workers
+        pending = deque()
+        for chunk in chunks(games, chunk_size):
+            pending.append(executor.submit(_replay_chunk, chunk))
+            if len(pending) >= limit:
+                for result in pending.popleft().result():
+                    yield result
+        while pending:
+            for result in pending.popleft().result():
+                yield result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="replay the games of a pgn file and check every move")
+    parser.add_argument("pgn", help="pgn file to read")
+    parser.add_argument("--workers", type=int, default=None, help="processes to replay in (default: one per cpu)")
+    parser.add_argument("--chunk", type=int, default=64, help="games sent to a process at a time")
+    parser.add_argument("--limit", type=int, default=None, help="stop after this many games")
+    parser.add_argument("--games", action="store_true", help="print a json line for every game")
+    parser.add_argument("--json", action="store_true", help="print the summary as json")
+    args = parser.parse_args(argv)
+
+    summary = {"games": 0, "illegal": 0, "plies": 0, "captures": 0, "checks": 0, "checkmates": 0}
+    start = time.perf_counter()
+    with open(args.pgn, encoding="utf-8", errors="replace") as pgn_file:
+        games = read_games(pgn_file)
+        if args.limit is not None:
+            games = itertools.islice(games, args.limit)
+        for result in replay(games, args.workers, args.chunk):
+            summary["games"] += 1
+            summary["plies"] += result["plies"]
+            summary["captures"] += result["captures"]
+            summary["checks"] += result["checks"]
+            summary["checkmates"] += result["checkmate"]
+            if not result["legal"]:
+                summary["illegal"] += 1
+            if args.games:
+                print(json.dumps(result))
+            elif not result["legal"]:
+                print("game {} ({} - {}): {}".format(result["game"] + 1, result["white"], result["black"],
+                                                     result["error"]))
+    seconds = time.perf_counter() - start
+    summary["seconds"] = round(seconds, 2)
+    summary["games_per_second"] = round(summary["games"] / seconds, 1) if seconds else 0
+
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    elif not args.games:
+        print("{games} games, {illegal} with illegal moves, {plies} plies, {checkmates} checkmates".format(**summary))
+        print("{seconds}s, {games_per_second} games per second".format(**summary))
+    return 1 if summary["illegal"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
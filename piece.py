@@ -29,8 +29,9 @@ class Piece(pygame.sprite.Sprite):
         h = self.cell_height = self.rect.height // self.rows
 
         self.cells = list([(i % cols * w, i // cols * h, w, h) for i in range(self.cell_count)])
+        # one subsurface per piece, sharing the pixels of the spritesheet
+        self.sprites = {name: self.spritesheet.subsurface(self.cells[index]) for name, index in self.pieces.items()}
 
     def draw(self, surface, piece_name, coords):
-        piece_index = self.pieces[piece_name]
-        surface.blit(self.spritesheet, coords, self.cells[piece_index])
+        surface.blit(self.sprites[piece_name], coords)
 
@@ -0,0 +1,81 @@
+import pygame
+
+# highlight colour of the selected piece and its moves, by the colour of the piece
+HIGHLIGHT_COLOURS = {
+    "white": (28, 21, 212, 170),
+    "black": (0, 194, 39, 170),
+}
+
+
+class BoardRenderer(object):
+    """draws the board screen and remembers what every square shows, so a
+    frame only redraws the squares that changed and pushes just their
+    rectangles to the display"""
+    def __init__(self, screen, assets, board_img, geometry, chess_pieces):
+        # display surface
+        self.screen = screen
+        # shared fonts, text and overlays
+        self.assets = assets
+        # where the squares are on the screen
+        self.geometry = geometry
+        # sprites of the chess pieces
+        self.chess_pieces = chess_pieces
+
+        # the empty board on a black screen, drawn once and copied from
+        # whenever a square or the header has to be cleared
+        self.background = pygame.Surface(screen.get_size()).convert()
+        self.background.fill((0, 0, 0))
+        self.background.blit(board_img, geometry.offset)
+        # strip above the board showing whose turn it is
+        self.header_rect = pygame.Rect(0, 0, screen.get_width(), geometry.offset_y)
+        # transparent overlays of highlighted squares
+        self.highlights = {colour: assets.overlay(rgba, geometry.square_length)
+                           for colour, rgba in HIGHLIGHT_COLOURS.items()}
+
+        # (piece name, highlight) shown on every square, None when the
+        # screen shows something else and has to be drawn from scratch
+        self.drawn = None
+        # text shown in the header
+        self.header = None
+
+    def invalidate(self):
+        """draw the whole board again on the next frame"""
+        self.drawn = None
+
+    def draw(self, squares, header):
+        """bring the screen up to date with squares, a dict of (piece name,
+        highlight colour or None) keyed by board x, y coordinates, and the
+        header text. returns the rectangles that were redrawn"""
+        full = self.drawn is None
+        if full:
+            self.screen.blit(self.background, (0, 0))
+            self.drawn = {}
+            self.header = None
+
+        rects = []
+        for (x, y), contents in squares.items():
+            if self.drawn.get((x, y)) == contents:
+                continue
+            self.drawn[(x, y)] = contents
+            piece_name, highlight = contents
+            rect = self.geometry.square_rect(x, y)
+            # clear the square, then draw its highlight and piece
+            self.screen.blit(self.background, rect, rect)
+            if highlight is not None:
+                self.screen.blit(self.highlights[highlight], rect)
+            if len(piece_name) > 1:
+                self.chess_pieces.draw(self.screen, piece_name, rect.topleft)
+            rects.append(rect)
+
+        if header != self.header:
+            self.header = header
+            self.screen.blit(self.background, self.header_rect, self.header_rect)
+            text = self.assets.text(header, 20, (255, 255, 255))
+            self.screen.blit(text, ((self.screen.get_width() - text.get_width()) // 2, 10))
+            rects.append(self.header_rect)
+
+        if full:
+            pygame.display.flip()
+        elif rects:
+            pygame.display.update(rects)
+        return rects
@@ -0,0 +1,234 @@
+import random
+
+from bitboard import Position, WHITE, BLACK, QUEEN, piece_name, square_from_coord, coord_from_square
+from move import move_from, move_to, is_promotion, promotion_piece
+
+
+class Rules(object):
+    """chess rules and game state, usable without pygame or a display"""
+    def __init__(self, log=print):
+        # function given every game message, None to keep quiet
+        self.log = log
+        # dictionary to keeping track of player turn
+        self.turn = {"black": 0,
+                     "white": 0}
+
+        # list containing possible moves for the selected piece
+        self.moves = []
+
+        # list containing captured pieces
+        self.captured = []
+        #
+        self.winner = ""
+
+        self.reset()
+
+    def reset(self, turn=None, fen=None):
+        """start a new game from the starting position, or from a fen string
+        which also decides whose turn it is"""
+        # parse first so a bad fen leaves the game untouched
+        if fen is not None:
+            position = Position.from_fen(fen)
+
+        # clear moves lists
+        self.moves = []
+
+        # randomize player turn unless a colour to start or a fen was given
+        if fen is not None:
+            x = 1 if position.side == BLACK else 0
+        elif turn is None:
+            x = random.randint(0, 1)
+        else:
+            x = 1 if turn == "black" else 0
+        self.turn["black"] = x
+        self.turn["white"] = 1 - x
+
+        # bitboard position used for move generation, the side to move
+        # follows the randomized turn
+        if fen is None:
+            position = Position.starting(BLACK if self.turn["black"] else WHITE)
+        self.position = position
+        # column character and row number of the selected piece
+        self.selected = None
+        # piece type pawns promote to
+        self.promotion = QUEEN
+
+        # two dimensonal dictionary containing details about each board location
+        # storage format is [piece_name, currently_selected, x_y_coordinate]
+        self.piece_location = {}
+        for x in range(8):
+            columnChar = chr(97 + x)
+            self.piece_location[columnChar] = {}
+            for y in range(8):
+                rowNo = 8 - y
+                # [piece name, currently selected, board coordinates]
+                self.piece_location[columnChar][rowNo] = ["", False, [x,y]]
+
+        # copy the pieces of the position to the board locations
+        self.sync_piece_location()
+
+        # a fen can start the game already won or drawn
+        self.winner = ""
+        self.check_game_over()
+
+    def fen(self):
+        """fen string of the current position"""
+        return self.position.to_fen()
+
+    def sync_piece_location(self, squares=range(64)):
+        """copy piece names from the bitboard position to piece_location for drawing"""
+        for square in squares:
+            piece = self.position.piece_at(square)
+            columnChar = chr(97 + (square & 7))
+            rowNo = (square >> 3) + 1
+            if piece is None:
+                self.piece_location[columnChar][rowNo][0] = ""
+            else:
+                self.piece_location[columnChar][rowNo][0] = piece_name(piece[0], piece[1])
+
+
+    # method to find the possible moves of the selected piece
+    def possible_moves(self, piece_name, piece_coord):
+        # list to store possible moves of the selected piece
+        positions = []
+        # find the possible locations to put a piece
+        if len(piece_name) > 0:
+            # get the square of the piece on the bitboard position
+            square = square_from_coord(piece_coord[0], piece_coord[1])
+            # convert the destination of every legal move of the piece to x, y coordinates
+            for move in self.position.legal_moves():
+                if move_from(move) == square:
+                    coord = coord_from_square(move_to(move))
+                    # promotions to different pieces share their destination
+                    if coord not in positions:
+                        positions.append(coord)
+
+        # return list containing possible moves for the selected piece
+        return positions
+
+
+    def select_square(self, turn, columnChar, rowNo):
+        """select a board square for the player whose turn it is, moving the
+        previously selected piece there when it is one of its possible moves"""
+        # get name of piece on the selected square
+        piece_name = self.piece_location[columnChar][rowNo][0]
+        # color of piece on the selected square
+        piece_color = piece_name[:5]
+
+        # get x, y coordinates
+        x, y = self.piece_location[columnChar][rowNo][2]
+
+        # if there's a piece on the selected square
+        if(len(piece_name) > 0) and (piece_color == turn):
+            # find possible moves for thr piece
+            self.moves = self.possible_moves(piece_name, [x,y])
+
+        # checkmate mechanism
+        p = self.piece_location[columnChar][rowNo]
+
+        for i in self.moves:
+            if i == [x, y]:
+                if(p[0][:5] == turn) or len(p[0]) == 0:
+                    self.validate_move([x,y])
+                else:
+                    self.capture_piece(turn, [columnChar, rowNo], [x,y])
+
+        # only the player with the turn gets to play
+        if(piece_color == turn):
+            # change selection flag of the previously selected piece
+            if self.selected is not None:
+                self.piece_location[self.selected[0]][self.selected[1]][1] = False
+
+            # change selection flag of the selected piece
+            self.piece_location[columnChar][rowNo][1] = True
+            self.selected = (columnChar, rowNo)
+
+    def play_move(self, turn, move):
+        """play an encoded move (see move.py), e.g. one chosen by a computer player"""
+        if is_promotion(move):
+            self.promotion = promotion_piece(move)
+        for square in (move_from(move), move_to(move)):
+            # select the source piece, then its destination
+            self.select_square(turn, chr(97 + (square & 7)), (square >> 3) + 1)
+        self.promotion = QUEEN
+
+    def capture_piece(self, turn, chess_board_coord, piece_coord):
+        # get x, y coordinate of the destination piece
+        x, y = piece_coord
+
+        # get chess board coordinate
+        columnChar, rowNo = chess_board_coord
+
+        p = self.piece_location[columnChar][rowNo]
+
+        # add the captured piece to list
+        self.captured.append(p[:])
+        # move source piece to its destination
+        self.validate_move(piece_coord)
+
+
+    def validate_move(self, destination):
+        # nothing to move without a selected piece
+        if self.selected is None:
+            return
+
+        srcColChar, srcRowNo = self.selected
+        desColChar = chr(97 + destination[0])
+        desRowNo = 8 - destination[1]
+        source = self.piece_location[srcColChar][srcRowNo]
+        from_sq = square_from_coord(*source[2])
+        to_sq = square_from_coord(destination[0], destination[1])
+
+        # find the legal move, promoting pawns to the chosen piece
+        move = None
+        for legal in self.position.legal_moves():
+            if (move_from(legal) == from_sq and move_to(legal) == to_sq and
+                    (not is_promotion(legal) or promotion_piece(legal) == self.promotion)):
+                move = legal
+                break
+        if move is None:
+            return
+
+        # unselect the source piece
+        source[1] = False
+        self.selected = None
+        src_name = source[0]
+        # play the move on the bitboard position
+        self.position.make_move(move)
+        # update the ranks of the move, which also hold a castled rook
+        # and a pawn taken en passant
+        for rank_no in {from_sq >> 3, to_sq >> 3}:
+            self.sync_piece_location(range(rank_no * 8, rank_no * 8 + 8))
+
+        # change turn
+        if(self.turn["black"]):
+            self.turn["black"] = 0
+            self.turn["white"] = 1
+        else:
+            self.turn["black"] = 1
+            self.turn["white"] = 0
+
+        src_location = srcColChar + str(srcRowNo)
+        des_location = desColChar + str(desRowNo)
+        if self.log is not None:
+            self.log("{} moved from {} to {}".format(src_name,  src_location, des_location))
+
+        self.check_game_over()
+
+    def check_game_over(self):
+        """set the winner when the player to move has no legal move, or the
+        game is drawn by repetition, the fifty move rule or lack of material"""
+        if not self.position.legal_moves():
+            if self.position.in_check():
+                self.winner = "White" if self.turn["black"] else "Black"
+                if self.log is not None:
+                    self.log("{} wins".format(self.winner))
+            else:
+                self.winner = "Draw"
+                if self.log is not None:
+                    self.log("Stalemate")
+        # checkmate on the last move before the fifty move rule still wins
+        elif self.position.is_draw():
+            self.winner = "Draw"
+            if self.log is not None:
+                self.log("Draw")
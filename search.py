@@ -0,0 +1,440 @@
+import math
+import time
+
+from evaluate import Evaluator
+from move import CAPTURE_BITS, PROMOTION_BITS, MAX_PLY, NULL_MOVE, new_move_buffers
+from ordering import MoveOrderer, mvv_lva
+from see import losing_capture
+from tablebase import WIN, LOSS
+from transposition import TranspositionTable, EXACT, LOWER, UPPER
+
+# score of a position where the side to move is checkmated
+MATE = 100000
+# bound larger than any reachable score
+INFINITY = 1000000
+# how many nodes are searched between two clock reads, about 10 ms at the
+# speed of this search
+CHECK_INTERVAL = 128
+# scores beyond this are mate scores and depend on the distance to the root
+MATE_BOUND = MATE - 1000
+
+# null move pruning: shallowest depth it is tried at, and the depth
+# reduction of the null move search, one more from NULL_MOVE_DEEP on
+NULL_MOVE_MIN_DEPTH = 3
+NULL_MOVE_REDUCTION = 2
+NULL_MOVE_DEEP = 7
+# late move reductions: shallowest depth and first move index that are reduced
+LMR_MIN_DEPTH = 3
+LMR_MIN_INDEX = 3
+# plies a late move is reduced by, indexed by depth and move index
+LMR_REDUCTIONS = [[0] + [int(0.75 + math.log(depth) * math.log(index) / 2.25) if depth else 0
+                         for index in range(1, 64)] for depth in range(64)]
+# futility pruning: how far below alpha the evaluation has to be, by
+# remaining depth, before quiet moves are not worth searching
+FUTILITY_MARGINS = [0, 200, 500]
+# aspiration windows: first iteration using one, its half width in
+# centipawns, and the width past which the window is given up
+ASPIRATION_MIN_DEPTH = 4
+ASPIRATION_WINDOW = 50
+ASPIRATION_MAX = 800
+
+
+class SearchAborted(Exception):
+    """raised inside the search when the time or node budget runs out"""
+
+
+class Search(object):
+    def __init__(self, max_depth=64, time_limit=None, node_limit=None, hash_mb=16, book=None, tablebases=None,
+                 ordering=True, quiescence=True, see_pruning=True, pvs=True, null_move=True, lmr=True,
+                 futility=True, aspiration=True):
+        # deepest iteration of iterative deepening
+        self.max_depth = max_depth
+        # seconds allowed per move, None for no time limit
+        self.time_limit = time_limit
+        # nodes allowed per move, None for no node limit
+        self.node_limit = node_limit
+        # transposition table kept between moves
+        self.table = TranspositionTable(hash_mb)
+        # one move buffer per ply, reused by every node at that ply
+        self.buffers = new_move_buffers()
+        # static evaluation of leaf positions
+        self.evaluator = Evaluator()
+        # sorts moves by hash move, mvv-lva, killers and history, None to
+        # only put the hash move and captures first
+        self.ordering = MoveOrderer() if ordering else None
+        # whether leaves search captures until the position is quiet, and
+        # whether that skips captures losing material by static exchange
+        self.quiescence = quiescence
+        self.see_pruning = see_pruning
+        # selective search: principal variation search with zero window
+        # re-searches, null move pruning, late move reductions, futility
+        # pruning near the leaves and aspiration windows at the root
+        self.pvs = pvs
+        self.null_move = null_move
+        self.lmr = lmr
+        self.futility = futility
+        self.aspiration = aspiration
+        # opening book consulted before searching, None to always search
+        self.book = book
+        # endgame tables giving exact scores of small endgames, None to search them
+        self.tablebases = tablebases
+        # threading.Event that stops the search when set, e.g. from another thread
+        self.stop_event = None
+        # called with the search after every completed iteration, e.g. to report progress
+        self.on_iteration = None
+
+        # statistics of the last search
+        self.start_time = 0.0
+        self.nodes = 0
+        # deepest ply reached, quiescence included
+        self.seldepth = 0
+        self.depth = 0
+        self.score = 0
+        self.best_move = None
+        # time the current search has to stop at
+        self.deadline = None
+
+    def sorted_moves(self, position, buffer, count, ply, hash_move):
+        """the moves of a node in the order they are searched"""
+        if self.ordering is not None:
+            return self.ordering.order(position, buffer, count, ply, hash_move)
+        return self.order_moves(buffer, count, hash_move)
+
+    def order_moves(self, buffer, count, first=None):
+        """put the move of the previous iteration first and captures before quiet moves"""
+        captures = []
+        quiets = []
+        for i in range(count):
+            move = buffer[i]
+            if move == first:
+                continue
+            if move & CAPTURE_BITS:
+                captures.append(move)
+            else:
+                quiets.append(move)
+        ordered = captures + quiets
+        if first is not None and len(ordered) < count:
+            ordered.insert(0, first)
+        return ordered
+
+    def score_to_table(self, score, ply):
+        """make mate scores relative to the stored node instead of the root"""
+        if score > MATE_BOUND:
+            return score + ply
+        if score < -MATE_BOUND:
+            return score - ply
+        return score
+
+    def score_from_table(self, score, ply):
+        """inverse of score_to_table"""
+        if score > MATE_BOUND:
+            return score - ply
+        if score < -MATE_BOUND:
+            return score + ply
+        return score
+
+    def check_budget(self):
+        """abort the search once the node or time budget has been spent"""
+        if self.node_limit is not None and self.nodes >= self.node_limit:
+            raise SearchAborted()
+        if self.nodes % CHECK_INTERVAL == 0:
+            if self.deadline is not None and time.perf_counter() >= self.deadline:
+                raise SearchAborted()
+            if self.stop_event is not None and self.stop_event.is_set():
+                raise SearchAborted()
+
+    def negamax(self, position, depth, alpha, beta, ply):
+        """alpha-beta search returning the score from the side to move's point of view"""
+        self.nodes += 1
+        self.check_budget()
+        if ply > self.seldepth:
+            self.seldepth = ply
+
+        # a position that occurred before is scored as a draw: a side that could
+        # do better would not repeat it, so once is as good as three times
+        if ply > 0 and (position.halfmove >= 100 or position.repetitions() >= 1):
+            return 0
+
+        # small endgames are looked up instead of searched
+        if self.tablebases is not None:
+            entry = self.tablebases.probe(position)
+            if entry is not None:
+                result, plies = entry
+                if result == WIN:
+                    return MATE - ply - plies
+                if result == LOSS:
+                    return -MATE + ply + plies
+                return 0
+
+        if depth == 0 or ply >= MAX_PLY:
+            if self.quiescence:
+                return self.quiesce(position, alpha, beta, ply)
+            return self.evaluator.evaluate(position)
+
+        # use the result of an earlier search of the same position
+        hash_move = None
+        entry = self.table.probe(position.hash)
+        if entry is not None:
+            entry_depth, bound, entry_score, hash_move = entry
+            if entry_depth >= depth:
+                entry_score = self.score_from_table(entry_score, ply)
+                if bound == EXACT:
+                    return entry_score
+                if bound == LOWER and entry_score >= beta:
+                    return entry_score
+                if bound == UPPER and entry_score <= alpha:
+                    return entry_score
+
+        buffer = self.buffers[ply]
+        count = position.generate_moves(buffer)
+        in_check = position.in_check()
+        # no legal move is checkmate when in check and stalemate otherwise
+        if count == 0:
+            return -MATE + ply if in_check else 0
+
+        # nodes searched with a zero window only have to prove a bound
+        zero_window = beta - alpha == 1
+        evaluation = self.evaluator.evaluate(position)
+
+        # when passing still leaves the opponent below beta, a real move will
+        # too. never twice in a row, in check, or with only pawns left, where
+        # passing might be the best move (zugzwang)
+        if (self.null_move and zero_window and not in_check and depth >= NULL_MOVE_MIN_DEPTH
+                and evaluation >= beta and position.has_pieces(position.side)
+                and not (position.undo_stack and position.undo_stack[-1][0] == NULL_MOVE)):
+            reduction = NULL_MOVE_REDUCTION + (depth >= NULL_MOVE_DEEP)
+            position.make_null_move()
+            try:
+                score = -self.negamax(position, max(0, depth - 1 - reduction), -beta, -beta + 1, ply + 1)
+            finally:
+                position.unmake_null_move()
+            if score >= beta:
+                # mates found after passing are not proven
+                return beta if score >= MATE_BOUND else score
+
+        # quiet moves cannot lift a position far below alpha this close to the leaves
+        futile = (self.futility and zero_window and not in_check and depth < len(FUTILITY_MARGINS)
+                  and abs(alpha) < MATE_BOUND and evaluation + FUTILITY_MARGINS[depth] <= alpha)
+
+        original_alpha = alpha
+        best = -INFINITY
+        best_move = None
+        for index, move in enumerate(self.sorted_moves(position, buffer, count, ply, hash_move)):
+            quiet = not move & (CAPTURE_BITS | PROMOTION_BITS)
+            position.make_move(move)
+            try:
+                gives_check = position.in_check()
+                if futile and quiet and not gives_check and best_move is not None:
+                    continue
+
+                # late quiet moves are searched shallower first, and again at
+                # full depth only if they turn out better than expected
+                reduction = 0
+                if (self.lmr and depth >= LMR_MIN_DEPTH and index >= LMR_MIN_INDEX and quiet
+                        and not in_check and not gives_check):
+                    reduction = min(LMR_REDUCTIONS[min(depth, 63)][min(index, 63)], depth - 2)
+
+                if index == 0 or (not self.pvs and reduction == 0):
+                    score = -self.negamax(position, depth - 1, -beta, -alpha, ply + 1)
+                else:
+                    # later moves only have to be shown no better than the best so far
+                    window = -alpha - 1 if self.pvs else -beta
+                    score = -self.negamax(position, depth - 1 - reduction, window, -alpha, ply + 1)
+                    if reduction and score > alpha:
+                        score = -self.negamax(position, depth - 1, window, -alpha, ply + 1)
+                    if self.pvs and alpha < score < beta:
+                        score = -self.negamax(position, depth - 1, -beta, -alpha, ply + 1)
+            finally:
+                position.unmake_move()
+            if score > best:
+                best = score
+                best_move = move
+                if score > alpha:
+                    alpha = score
+                    # the opponent will avoid this line
+                    if alpha >= beta:
+                        if self.ordering is not None:
+                            self.ordering.cutoff(position, move, ply, depth, index)
+                        break
+
+        # remember the result and which kind of bound it is
+        if best <= original_alpha:
+            bound = UPPER
+        elif best >= beta:
+            bound = LOWER
+        else:
+            bound = EXACT
+        self.table.store(position.hash, depth, bound, self.score_to_table(best, ply), best_move)
+        return best
+
+    def quiesce(self, position, alpha, beta, ply):
+        """search captures and promotions until the position is quiet, so the
+        evaluation is never taken in the middle of an exchange"""
+        if ply > self.seldepth:
+            self.seldepth = ply
+        if ply >= MAX_PLY:
+            return self.evaluator.evaluate(position)
+
+        buffer = self.buffers[ply]
+        count = position.generate_moves(buffer)
+        in_check = position.in_check()
+        if count == 0:
+            return -MATE + ply if in_check else 0
+
+        if in_check:
+            # every evasion is searched, standing pat is no option in check
+            best = -INFINITY
+            moves = self.sorted_moves(position, buffer, count, ply, None)
+        else:
+            # the side to move can stand pat instead of capturing
+            best = self.evaluator.evaluate(position)
+            if best >= beta:
+                return best
+            if best > alpha:
+                alpha = best
+            moves = []
+            for i in range(count):
+                move = buffer[i]
+                if not move & (CAPTURE_BITS | PROMOTION_BITS):
+                    continue
+                # captures losing material are not worth searching
+                if self.see_pruning and move & CAPTURE_BITS and losing_capture(position, move):
+                    continue
+                moves.append(move)
+            moves.sort(key=lambda move: mvv_lva(position, move), reverse=True)
+
+        for move in moves:
+            position.make_move(move)
+            self.nodes += 1
+            try:
+                self.check_budget()
+                score = -self.quiesce(position, -beta, -alpha, ply + 1)
+            finally:
+                position.unmake_move()
+            if score > best:
+                best = score
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        break
+        return best
+
+    def search_root(self, position, depth, moves=None, alpha=-INFINITY, beta=INFINITY):
+        """search the root moves, by default all of them, to a depth within a
+        window and return (best move, score)"""
+        original_alpha = alpha
+        best = -INFINITY
+        best_move = None
+        if moves is None:
+            buffer = self.buffers[0]
+            count = position.generate_moves(buffer)
+        else:
+            buffer = moves
+            count = len(moves)
+        for index, move in enumerate(self.sorted_moves(position, buffer, count, 0, self.best_move)):
+            position.make_move(move)
+            try:
+                if index == 0 or not self.pvs:
+                    score = -self.negamax(position, depth - 1, -beta, -alpha, 1)
+                else:
+                    score = -self.negamax(position, depth - 1, -alpha - 1, -alpha, 1)
+                    if alpha < score < beta:
+                        score = -self.negamax(position, depth - 1, -beta, -alpha, 1)
+            finally:
+                position.unmake_move()
+            if score > best:
+                best = score
+                best_move = move
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        break
+        # only a search of every root move inside the window gives the exact score of the position
+        if best_move is not None and moves is None and original_alpha < best < beta:
+            self.table.store(position.hash, depth, EXACT, self.score_to_table(best, 0), best_move)
+        return best_move, best
+
+    def search_window(self, position, depth):
+        """search the root to a depth, first in a narrow window around the
+        score of the last iteration, widening it until the score falls inside"""
+        if not self.aspiration or depth < ASPIRATION_MIN_DEPTH or abs(self.score) >= MATE_BOUND:
+            return self.search_root(position, depth)
+        window = ASPIRATION_WINDOW
+        alpha = self.score - window
+        beta = self.score + window
+        while True:
+            best_move, score = self.search_root(position, depth, None, alpha, beta)
+            if alpha < score < beta:
+                return best_move, score
+            # widen the side the score fell out of, give up on narrow windows eventually
+            window *= 2
+            if score <= alpha:
+                alpha = -INFINITY if window > ASPIRATION_MAX else score - window
+            else:
+                beta = INFINITY if window > ASPIRATION_MAX else score + window
+
+    def search(self, position):
+        """iterative deepening search returning the best move found within the budget"""
+        self.nodes = 0
+        self.seldepth = 0
+        self.depth = 0
+        self.score = 0
+        self.best_move = None
+        self.deadline = None
+        self.start_time = time.perf_counter()
+        if self.book is not None:
+            self.best_move = self.book.pick(position)
+            if self.best_move is not None:
+                return self.best_move
+        self.table.new_search()
+        if self.ordering is not None:
+            self.ordering.new_search()
+        if self.time_limit is not None:
+            self.deadline = time.perf_counter() + self.time_limit
+
+        for depth in range(1, self.max_depth + 1):
+            try:
+                best_move, score = self.search_window(position, depth)
+            except SearchAborted:
+                break
+            # checkmate or stalemate at the root, there is nothing to play or report
+            if best_move is None:
+                self.score = -MATE if position.in_check() else 0
+                break
+            # keep the result of every completed iteration
+            self.best_move = best_move
+            self.score = score
+            self.depth = depth
+            if self.on_iteration is not None:
+                self.on_iteration(self)
+            # nothing left to search for once a forced mate has been found
+            if abs(score) >= MATE - self.max_depth:
+                break
+
+        # fall back on any move if not even the first iteration completed
+        if self.best_move is None:
+            moves = position.legal_moves()
+            if moves:
+                self.best_move = moves[0]
+        return self.best_move
+
+    def principal_variation(self, position):
+        """best line of the last search from its root position, following the
+        moves stored in the transposition table"""
+        if self.best_move is None:
+            return []
+        line = [self.best_move]
+        position = position.copy()
+        position.make_move(self.best_move)
+        seen = {position.hash}
+        while len(line) < self.depth:
+            entry = self.table.probe(position.hash)
+            if entry is None or not entry[3] or entry[3] not in position.legal_moves():
+                break
+            position.make_move(entry[3])
+            # stop at repetitions
+            if position.hash in seen:
+                break
+            seen.add(position.hash)
+            line.append(entry[3])
+        return line
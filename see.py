@@ -0,0 +1,79 @@
+# static exchange evaluation
+#
+# works out what a capture wins once every piece attacking the target
+# square has joined in, each side recapturing with its least valuable
+# attacker and free to stop when going on would lose material. the
+# attackers come from the precomputed attack tables, with sliders behind
+# a piece that has captured seeing through it, so no move is ever made.
+# pins are ignored
+
+from bitboard import WHITE, BLACK, PAWN, KING
+from move import EP_CAPTURE, is_capture, is_promotion, promotion_piece
+from pst import PIECE_VALUES
+
+# material values the exchange is counted in, the king worth more than
+# everything else so capturing it ends any exchange
+SEE_VALUES = PIECE_VALUES[:KING] + [20000]
+
+
+def losing_capture(position, move):
+    """whether a capture loses material by static exchange"""
+    victim = position.squares[(move >> 6) & 63]
+    # taking a piece worth at least the capturer never loses material
+    if victim is not None and SEE_VALUES[victim[1]] >= SEE_VALUES[position.squares[move & 63][1]]:
+        return False
+    return static_exchange(position, move) < 0
+
+
+def static_exchange(position, move):
+    """material the side to move wins with a capture or promotion, in
+    centipawns, when both sides recapture on the target square as long
+    as it pays"""
+    from_sq = move & 63
+    to_sq = (move >> 6) & 63
+    side = position.side
+    attacker = position.squares[from_sq][1]
+
+    # pieces taken off the board as the exchange goes on
+    occupied = position.occupied ^ (1 << from_sq)
+    if not is_capture(move):
+        victim_value = 0
+    elif (move >> 12) == EP_CAPTURE:
+        victim_value = SEE_VALUES[PAWN]
+        occupied ^= 1 << (to_sq - 8 if side == WHITE else to_sq + 8)
+    else:
+        victim_value = SEE_VALUES[position.squares[to_sq][1]]
+
+    # value of the piece standing on the target square after the capture
+    on_square = SEE_VALUES[attacker]
+    if is_promotion(move):
+        on_square = SEE_VALUES[promotion_piece(move)]
+        victim_value += on_square - SEE_VALUES[PAWN]
+
+    # gains[d] is what the side making capture d has won if the exchange stops after it
+    gains = [victim_value]
+    bitboards = position.bitboards
+    attackers = (position.attackers_to(to_sq, WHITE, occupied) |
+                 position.attackers_to(to_sq, BLACK, occupied)) & occupied
+    side ^= 1
+    while True:
+        own = attackers & position.occupancy[side]
+        if not own:
+            break
+        # recapture with the least valuable attacker
+        for piece_type in range(6):
+            pieces = own & bitboards[side][piece_type]
+            if pieces:
+                break
+        gains.append(on_square - gains[-1])
+        occupied ^= pieces & -pieces
+        on_square = SEE_VALUES[piece_type]
+        # sliders lined up behind the piece that moved join in
+        attackers = (position.attackers_to(to_sq, WHITE, occupied) |
+                     position.attackers_to(to_sq, BLACK, occupied)) & occupied
+        side ^= 1
+
+    # each side only goes on with the exchange when that does not lose
+    for d in range(len(gains) - 1, 0, -1):
+        gains[d - 1] = -max(-gains[d - 1], gains[d])
+    return gains[0]
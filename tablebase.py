@@ -0,0 +1,485 @@
+import argparse
+import mmap
+import os
+import struct
+import sys
+import time
+from array import array
+
+from attacks import KNIGHT_ATTACKS, KING_ATTACKS, PAWN_ATTACKS, rook_attacks, bishop_attacks, queen_attacks
+from bitboard import (Position, WHITE, BLACK, PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING, PIECE_LETTERS,
+                      iter_bits, pop_count)
+
+# result of a position from the side to move's point of view, two bits each
+DRAW = 0
+WIN = 1
+LOSS = 2
+# index slots that are not a legal canonical position
+INVALID = 3
+RESULT_NAMES = ["draw", "win", "loss", "invalid"]
+
+# endgames generated by default, in an order where every table only needs
+# the tables before it
+ENDGAMES = ["KQK", "KRK", "KPK", "KBNK"]
+
+# file header: magic, format version, endgame name and number of positions.
+# the header is followed by the results packed four to a byte, then one
+# byte per position with the number of plies to mate
+HEADER = struct.Struct("<4sB7sI")
+MAGIC = b"CBTB"
+VERSION = 1
+EXTENSION = ".cbtb"
+
+# exit flags of a position during generation
+HAS_DRAW = 1
+HAS_WIN = 2
+
+
+def _transforms():
+    """the 8 symmetries of the board as square maps: the 4 flips, with and
+    without swapping files and ranks"""
+    transforms = []
+    for flip in (0, 7, 56, 63):
+        transforms.append([square ^ flip for square in range(64)])
+        transforms.append([((square ^ flip) & 7) << 3 | ((square ^ flip) >> 3) for square in range(64)])
+    return transforms
+
+
+ALL_TRANSFORMS = _transforms()
+# with pawns on the board only mirroring the files keeps the same position
+PAWN_TRANSFORMS = [ALL_TRANSFORMS[0], ALL_TRANSFORMS[2]]
+
+
+def piece_attacks(colour, piece_type, square, occupied):
+    """squares a piece attacks"""
+    if piece_type == KNIGHT:
+        return KNIGHT_ATTACKS[square]
+    if piece_type == KING:
+        return KING_ATTACKS[square]
+    if piece_type == BISHOP:
+        return bishop_attacks(square, occupied)
+    if piece_type == ROOK:
+        return rook_attacks(square, occupied)
+    if piece_type == QUEEN:
+        return queen_attacks(square, occupied)
+    return PAWN_ATTACKS[colour][square]
+
+
+def endgame_name(position):
+    """name of the endgame of a position with the stronger side first, e.g.
+    'KBNK', and whether black is the stronger side"""
+    letters = []
+    for colour in (WHITE, BLACK):
+        pieces = ""
+        for piece_type in (QUEEN, ROOK, BISHOP, KNIGHT, PAWN):
+            pieces += PIECE_LETTERS[piece_type].upper() * pop_count(position.bitboards[colour][piece_type])
+        letters.append(pieces)
+    flipped = len(letters[BLACK]) > len(letters[WHITE])
+    if flipped:
+        letters.reverse()
+    return "K" + letters[0] + "K" + letters[1], flipped
+
+
+class Endgame(object):
+    """pieces, symmetries and position index of an endgame like 'KQK'
+
+    white is always the side named first. a position is indexed by the side
+    to move, the slot of its first pawn (or of the white king when there are
+    no pawns) among the squares left after removing symmetric copies, and the
+    squares of the other pieces. every legal position has exactly one index"""
+    def __init__(self, name):
+        self.name = name
+        split = name.index("K", 1)
+        # (colour, piece type) of every piece in index order
+        self.pieces = ([(WHITE, PIECE_LETTERS.index(letter.lower())) for letter in name[:split]] +
+                       [(BLACK, PIECE_LETTERS.index(letter.lower())) for letter in name[split:]])
+        self.kings = [self.pieces.index((WHITE, KING)), self.pieces.index((BLACK, KING))]
+
+        if (WHITE, PAWN) in self.pieces or (BLACK, PAWN) in self.pieces:
+            self.transforms = PAWN_TRANSFORMS
+            self.primary = [piece_type for colour, piece_type in self.pieces].index(PAWN)
+            # pawns on files a to d, ranks 2 to 7
+            self.slots = [square for square in range(8, 56) if square & 7 < 4]
+        else:
+            self.transforms = ALL_TRANSFORMS
+            self.primary = self.kings[WHITE]
+            # the a1-d1-d4 triangle
+            self.slots = [square for square in range(64)
+                          if square == min(transform[square] for transform in ALL_TRANSFORMS)]
+        self.others = [i for i in range(len(self.pieces)) if i != self.primary]
+        self.slot_of = [-1] * 64
+        for slot, square in enumerate(self.slots):
+            self.slot_of[square] = slot
+        self.size = 2 * len(self.slots) * 64 ** len(self.others)
+
+    def index(self, side, squares):
+        """index of a position given the side to move and the square of every piece"""
+        best = None
+        for transform in self.transforms:
+            slot = self.slot_of[transform[squares[self.primary]]]
+            if slot < 0:
+                continue
+            index = side * len(self.slots) + slot
+            for i in self.others:
+                index = index * 64 + transform[squares[i]]
+            if best is None or index < best:
+                best = index
+        return best
+
+    def decode(self, index):
+        """side to move and piece squares of an index"""
+        squares = [0] * len(self.pieces)
+        for i in reversed(self.others):
+            index, squares[i] = divmod(index, 64)
+        side, slot = divmod(index, len(self.slots))
+        squares[self.primary] = self.slots[slot]
+        return side, squares
+
+    def position(self, side, squares):
+        """board position of a side to move and piece squares"""
+        position = Position()
+        for (colour, piece_type), square in zip(self.pieces, squares):
+            position.put(colour, piece_type, square)
+        position.side = side
+        position.hash = position.compute_hash()
+        return position
+
+    def attacked(self, square, colour, squares, occupied):
+        """whether the pieces of a colour attack a square"""
+        bit = 1 << square
+        for (piece_colour, piece_type), piece_square in zip(self.pieces, squares):
+            if piece_colour == colour and piece_attacks(colour, piece_type, piece_square, occupied) & bit:
+                return True
+        return False
+
+
+class EndgameTable(object):
+    """generated table of one endgame, memory mapped from its file"""
+    def __init__(self, path):
+        self.file = open(path, "rb")
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, name, size = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("{} is not an endgame table".format(path))
+        self.endgame = Endgame(name.rstrip(b"\0").decode())
+        if size != self.endgame.size:
+            raise ValueError("{} has {} positions, expected {}".format(path, size, self.endgame.size))
+        self.result_offset = HEADER.size
+        self.dtm_offset = HEADER.size + (size + 3) // 4
+
+    def close(self):
+        """unmap and close the table file"""
+        self.map.close()
+        self.file.close()
+
+    def result(self, index):
+        """(result, plies to mate) of the position with an index"""
+        byte = self.map[self.result_offset + (index >> 2)]
+        return (byte >> ((index & 3) * 2)) & 3, self.map[self.dtm_offset + index]
+
+
+class Tablebases(object):
+    """probes endgame tables from a directory, loading each table the first
+    time a position of its endgame is probed"""
+    def __init__(self, directory):
+        self.directory = directory
+        # loaded tables by endgame name, None for endgames without a file
+        self.tables = {}
+
+    def close(self):
+        """close every loaded table"""
+        for table in self.tables.values():
+            if table is not None:
+                table.close()
+        self.tables = {}
+
+    def table(self, name):
+        """table of an endgame, None when it has not been generated"""
+        if name not in self.tables:
+            path = os.path.join(self.directory, name + EXTENSION)
+            self.tables[name] = EndgameTable(path) if os.path.exists(path) else None
+        return self.tables[name]
+
+    def probe(self, position):
+        """(result, plies to mate) of a position from the side to move's point of
+        view, or None when no table covers it"""
+        if pop_count(position.occupied) > 5 or position.castling:
+            return None
+        name, flipped = endgame_name(position)
+        table = self.table(name)
+        if table is None:
+            return None
+
+        # tables have white as the stronger side, so mirror the board and
+        # swap the colours when black is stronger
+        endgame = table.endgame
+        side = position.side ^ flipped
+        flip = 56 if flipped else 0
+        squares = []
+        used = 0
+        for colour, piece_type in endgame.pieces:
+            for square in iter_bits(position.bitboards[colour ^ flipped][piece_type] & ~used):
+                used |= 1 << square
+                squares.append(square ^ flip)
+                break
+        result, dtm = table.result(endgame.index(side, squares))
+        if result == INVALID:
+            return None
+        return result, dtm
+
+
+class TableGenerator(object):
+    """retrograde analysis of one endgame
+
+    positions are solved backwards from the checkmates: a position is won
+    when a move reaches a lost position, and lost once every move reaches a
+    won position. captures and promotions leave the endgame and are looked
+    up in already generated tables through a Tablebases"""
+    def __init__(self, name, tablebases):
+        self.endgame = Endgame(name)
+        self.tablebases = tablebases
+
+    def legal(self, side, squares):
+        """whether a position is legal: no two pieces share a square, no pawn
+        stands on the first or last rank and the side not to move is not in check"""
+        if len(set(squares)) != len(squares):
+            return False
+        for (colour, piece_type), square in zip(self.endgame.pieces, squares):
+            if piece_type == PAWN and not 8 <= square < 56:
+                return False
+        occupied = 0
+        for square in squares:
+            occupied |= 1 << square
+        king = squares[self.endgame.kings[side ^ 1]]
+        return not self.endgame.attacked(king, side, squares, occupied)
+
+    def exit_result(self, position):
+        """(result, plies to mate) of a position outside the endgame"""
+        result = self.tablebases.probe(position)
+        if result is not None:
+            return result
+        if position.insufficient_material():
+            return DRAW, 0
+        raise ValueError("no table for {}".format(endgame_name(position)[0]))
+
+    def successors(self, side, squares):
+        """(indices of the positions reached by every legal move that stays in the
+        endgame, results of the positions reached by captures and promotions)"""
+        endgame = self.endgame
+        pieces = endgame.pieces
+        occupied = 0
+        own = 0
+        for (colour, piece_type), square in zip(pieces, squares):
+            occupied |= 1 << square
+            if colour == side:
+                own |= 1 << square
+        king = endgame.kings[side]
+
+        children = set()
+        exits = []
+        for i, (colour, piece_type) in enumerate(pieces):
+            if colour != side:
+                continue
+            from_sq = squares[i]
+            if piece_type == PAWN:
+                forward = 8 if side == WHITE else -8
+                targets = PAWN_ATTACKS[side][from_sq] & occupied & ~own
+                if not occupied & (1 << (from_sq + forward)):
+                    targets |= 1 << (from_sq + forward)
+                    start = 1 if side == WHITE else 6
+                    if from_sq >> 3 == start and not occupied & (1 << (from_sq + 2 * forward)):
+                        targets |= 1 << (from_sq + 2 * forward)
+            else:
+                targets = piece_attacks(side, piece_type, from_sq, occupied) & ~own
+
+            for to_sq in iter_bits(targets):
+                promotion = piece_type == PAWN and not 8 <= to_sq < 56
+                if occupied & (1 << to_sq) or promotion:
+                    # captures and promotions leave the endgame
+                    position = endgame.position(side ^ 1, squares)
+                    position.remove(from_sq)
+                    if occupied & (1 << to_sq):
+                        position.remove(to_sq)
+                    for new_type in ((QUEEN, ROOK, BISHOP, KNIGHT) if promotion else (piece_type,)):
+                        position.put(side, new_type, to_sq)
+                        if not position.in_check(side):
+                            exits.append(self.exit_result(position))
+                        position.remove(to_sq)
+                    continue
+                moved = squares[:]
+                moved[i] = to_sq
+                moved_occupied = occupied ^ (1 << from_sq) ^ (1 << to_sq)
+                if not endgame.attacked(moved[king], side ^ 1, moved, moved_occupied):
+                    children.add(endgame.index(side ^ 1, moved))
+        return children, exits
+
+    def predecessors(self, side, squares):
+        """indices of the legal positions with the other side to move that reach
+        this one in a move without a capture or promotion"""
+        endgame = self.endgame
+        mover = side ^ 1
+        occupied = 0
+        for square in squares:
+            occupied |= 1 << square
+        king = squares[endgame.kings[side]]
+
+        parents = set()
+        for i, (colour, piece_type) in enumerate(endgame.pieces):
+            if colour != mover:
+                continue
+            to_sq = squares[i]
+            if piece_type == PAWN:
+                # pawns step back, or two squares back from their fourth rank
+                back = -8 if mover == WHITE else 8
+                sources = 0
+                from_sq = to_sq + back
+                if 8 <= from_sq < 56 and not occupied & (1 << from_sq):
+                    sources |= 1 << from_sq
+                    fourth = 3 if mover == WHITE else 4
+                    if to_sq >> 3 == fourth and not occupied & (1 << (from_sq + back)):
+                        sources |= 1 << (from_sq + back)
+            else:
+                sources = piece_attacks(mover, piece_type, to_sq, occupied) & ~occupied
+
+            for from_sq in iter_bits(sources):
+                moved = squares[:]
+                moved[i] = from_sq
+                moved_occupied = occupied ^ (1 << from_sq) ^ (1 << to_sq)
+                # the side that did not move cannot be left in check
+                if not endgame.attacked(king, mover, moved, moved_occupied):
+                    parents.add(endgame.index(mover, moved))
+        return parents
+
+    def generate(self, report=None):
+        """solve every position, returning (results, plies to mate) as bytearrays
+        indexed by position index"""
+        endgame = self.endgame
+        size = endgame.size
+        results = bytearray(size)
+        dtm = bytearray(size)
+        # distinct moves of every position not yet known to lose
+        remaining = bytearray(size)
+        # whether a capture or promotion draws or wins
+        flags = bytearray(size)
+        # plies to mate of the slowest losing capture or promotion
+        exit_loss = bytearray(size)
+        # positions to settle by plies to mate: odd plies are wins, even plies losses
+        levels = [array("I")]
+
+        def push(level, index):
+            while len(levels) <= level:
+                levels.append(array("I"))
+            levels[level].append(index)
+
+        for index in range(size):
+            side, squares = endgame.decode(index)
+            if not self.legal(side, squares) or endgame.index(side, squares) != index:
+                results[index] = INVALID
+                continue
+            children, exits = self.successors(side, squares)
+            remaining[index] = len(children)
+            for result, plies in exits:
+                if result == LOSS:
+                    flags[index] |= HAS_WIN
+                    push(plies + 1, index)
+                elif result == DRAW:
+                    flags[index] |= HAS_DRAW
+                else:
+                    exit_loss[index] = max(exit_loss[index], plies + 1)
+            if not children and not flags[index]:
+                if exits:
+                    push(exit_loss[index], index)
+                elif endgame.attacked(squares[endgame.kings[side]], side ^ 1, squares,
+                                      sum(1 << square for square in squares)):
+                    # checkmate
+                    push(0, index)
+            if report is not None and index % 100000 == 0:
+                report("{} initialised {}/{}".format(endgame.name, index, size))
+
+        level = 0
+        while level < len(levels):
+            result = WIN if level & 1 else LOSS
+            settled = 0
+            for index in levels[level]:
+                if results[index]:
+                    continue
+                settled += 1
+                results[index] = result
+                dtm[index] = level
+                side, squares = endgame.decode(index)
+                for parent in self.predecessors(side, squares):
+                    if results[parent]:
+                        continue
+                    if result == LOSS:
+                        push(level + 1, parent)
+                    elif not flags[parent]:
+                        remaining[parent] -= 1
+                        if remaining[parent] == 0:
+                            push(max(level + 1, exit_loss[parent]), parent)
+            if report is not None:
+                report("{} {} plies: {} positions".format(endgame.name, level, settled))
+            level += 1
+        # everything left unsettled is a draw
+        return results, dtm
+
+
+def write_table(path, name, results, dtm):
+    """write a generated table to a file"""
+    packed = bytearray((len(results) + 3) // 4)
+    for index, result in enumerate(results):
+        if result:
+            packed[index >> 2] |= result << ((index & 3) * 2)
+    with open(path, "wb") as table_file:
+        table_file.write(HEADER.pack(MAGIC, VERSION, name.encode(), len(results)))
+        table_file.write(packed)
+        table_file.write(dtm)
+
+
+def generate(names, directory, report=print):
+    """generate the tables of some endgames into a directory, in order"""
+    os.makedirs(directory, exist_ok=True)
+    tablebases = Tablebases(directory)
+    for name in names:
+        start = time.perf_counter()
+        results, dtm = TableGenerator(name, tablebases).generate(report)
+        path = os.path.join(directory, name + EXTENSION)
+        write_table(path, name, results, dtm)
+        # the next tables may need this one for their promotions
+        tablebases.tables.pop(name, None)
+        counts = [results.count(result) for result in (WIN, LOSS, DRAW)]
+        report("{}: {} wins, {} losses, {} draws, longest mate {} plies, {:.1f}s".format(
+            name, counts[0], counts[1], counts[2], max(dtm), time.perf_counter() - start))
+    tablebases.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="generate or probe endgame tables")
+    parser.add_argument("--dir", default=os.path.join("res", "tablebases"), help="directory of the table files")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("generate", help="generate tables by retrograde analysis")
+    build.add_argument("endgames", nargs="*", default=ENDGAMES, help="endgames to generate, e.g. KQK KRK")
+    probe = commands.add_parser("probe", help="look up a position")
+    probe.add_argument("fen", help="position to look up")
+    args = parser.parse_args(argv)
+
+    if args.command == "generate":
+        generate(args.endgames, args.dir)
+        return 0
+
+    # report a bad fen before opening the tables
+    try:
+        position = Position.from_fen(args.fen)
+    except ValueError as error:
+        probe.error(str(error))
+    tablebases = Tablebases(args.dir)
+    result = tablebases.probe(position)
+    tablebases.close()
+    if result is None:
+        print("not in the tables")
+        return 1
+    print("{} in {} plies".format(RESULT_NAMES[result[0]], result[1]) if result[0] else "draw")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,148 @@
+import argparse
+import json
+import math
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from bitboard import Position, WHITE, BLACK
+from search import Search
+
+# games running longer than this many plies are scored as draws
+MAX_PLIES = 400
+
+
+def parse_flag(value):
+    """turn a switch value like 'on', '1' or 'off' into a bool"""
+    return value.strip().lower() not in ("0", "off", "false", "no")
+
+
+def parse_engine(spec):
+    """turn an engine spec like 'depth=3,nodes=5000,movetime=0.1,hash=16,see=off' into Search arguments"""
+    names = {"depth": ("max_depth", int), "nodes": ("node_limit", int),
+             "movetime": ("time_limit", float), "hash": ("hash_mb", int),
+             "ordering": ("ordering", parse_flag), "quiescence": ("quiescence", parse_flag),
+             "see": ("see_pruning", parse_flag), "pvs": ("pvs", parse_flag),
+             "nullmove": ("null_move", parse_flag), "lmr": ("lmr", parse_flag),
+             "futility": ("futility", parse_flag), "aspiration": ("aspiration", parse_flag)}
+    options = {}
+    for item in spec.split(","):
+        if not item:
+            continue
+        key, value = item.split("=")
+        name, kind = names[key.strip()]
+        options[name] = kind(value)
+    return options
+
+
+def play_game(index, engines, random_plies, seed):
+    """play one game and return its result from the first engine's point of view
+
+    the engines swap colours every game, and both games of a pair start from
+    the same random opening"""
+    # the first engine plays white in even games
+    first_colour = WHITE if index % 2 == 0 else BLACK
+    players = {first_colour: Search(**engines[0]), first_colour ^ 1: Search(**engines[1])}
+
+    position = Position.starting()
+    generator = random.Random(seed + index // 2)
+    for ply in range(random_plies):
+        moves = position.legal_moves()
+        if not moves:
+            break
+        position.make_move(generator.choice(moves))
+
+    # seconds and number of moves per engine
+    think_time = [0.0, 0.0]
+    move_count = [0, 0]
+    result = 0.5
+    while True:
+        moves = position.legal_moves()
+        if not moves:
+            # checkmate loses for the side to move, stalemate is a draw
+            if position.in_check():
+                result = 0.0 if position.side == first_colour else 1.0
+            break
+        if position.is_draw() or len(position.undo_stack) >= MAX_PLIES:
+            break
+
+        engine = 0 if position.side == first_colour else 1
+        start = time.perf_counter()
+        move = players[position.side].search(position)
+        think_time[engine] += time.perf_counter() - start
+        move_count[engine] += 1
+        position.make_move(move)
+
+    return {"game": index, "result": result, "plies": len(position.undo_stack),
+            "think_time": think_time, "moves": move_count}
+
+
+def elo(score):
+    """elo difference matching an expected score"""
+    score = min(max(score, 1e-6), 1 - 1e-6)
+    return -400 * math.log10(1 / score - 1)
+
+
+def summarise(results):
+    """win/draw/loss counts, elo difference with a 95% error bar and time per move"""
+    games = len(results)
+    wins = sum(1 for r in results if r["result"] == 1.0)
+    draws = sum(1 for r in results if r["result"] == 0.5)
+    losses = games - wins - draws
+    score = (wins + draws / 2) / games
+    # standard error of the mean game score
+    variance = sum((r["result"] - score) ** 2 for r in results) / games
+    margin = 1.96 * math.sqrt(variance / games)
+
+    summary = {
+        "games": games,
+        "wins": wins,
+        "draws": draws,
+        "losses": losses,
+        "score": round(score, 4),
+        "elo": round(elo(score), 1),
+        "elo_low": round(elo(score - margin), 1),
+        "elo_high": round(elo(score + margin), 1),
+    }
+    for engine in range(2):
+        moves = sum(r["moves"][engine] for r in results)
+        seconds = sum(r["think_time"][engine] for r in results)
+        summary["engine{}_ms_per_move".format(engine + 1)] = round(1000 * seconds / moves, 2) if moves else 0
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="play bot against bot without a window")
+    parser.add_argument("--games", type=int, default=10, help="number of games to play")
+    parser.add_argument("--engine1", default="depth=3", help="settings of the first bot, e.g. depth=3,nodes=5000")
+    parser.add_argument("--engine2", default="depth=2", help="settings of the second bot")
+    parser.add_argument("--workers", type=int, default=None, help="processes to play games in (default: one per cpu)")
+    parser.add_argument("--random-plies", type=int, default=4, help="random opening moves before the bots take over")
+    parser.add_argument("--seed", type=int, default=1, help="seed of the random openings")
+    parser.add_argument("--json", action="store_true", help="print machine readable json instead of text")
+    args = parser.parse_args(argv)
+
+    engines = [parse_engine(args.engine1), parse_engine(args.engine2)]
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        futures = [executor.submit(play_game, index, engines, args.random_plies, args.seed)
+                   for index in range(args.games)]
+        results = [future.result() for future in futures]
+    summary = summarise(results)
+    summary["seconds"] = round(time.perf_counter() - start, 2)
+
+    if args.json:
+        print(json.dumps({"summary": summary, "games": results}, indent=2))
+    else:
+        print("engine1: {}  engine2: {}".format(args.engine1, args.engine2))
+        print("games {games}  +{wins} ={draws} -{losses}  score {score}".format(**summary))
+        print("elo difference {elo} [{elo_low}, {elo_high}]".format(**summary))
+        print("ms per move: engine1 {engine1_ms_per_move}  engine2 {engine2_ms_per_move}".format(**summary))
+        print("total time {seconds}s".format(**summary))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
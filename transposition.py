@@ -0,0 +1,91 @@
+from array import array
+
+# bound types of a stored score
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+# bytes taken by one entry: a 64 bit key and a 64 bit packed data word
+ENTRY_BYTES = 16
+# entries per bucket: slot 0 is depth preferred, slot 1 is always replaced
+BUCKET_SIZE = 2
+
+# layout of the packed data word, the 16 bit move (see move.py) takes the lowest bits
+DEPTH_SHIFT = 16
+BOUND_SHIFT = 24
+GENERATION_SHIFT = 26
+SCORE_SHIFT = 34
+# scores are stored with an offset so they are never negative
+SCORE_OFFSET = 1 << 29
+
+
+class TranspositionTable(object):
+    def __init__(self, size_mb=16):
+        # number of buckets, rounded down to a power of two so the key can be masked
+        buckets = max(1, (size_mb * 1024 * 1024) // (ENTRY_BYTES * BUCKET_SIZE))
+        buckets = 1 << (buckets.bit_length() - 1)
+        self.mask = buckets - 1
+        self.size_mb = size_mb
+
+        # fixed size arrays, so memory stays flat however long the search runs
+        self.keys = array("Q", bytes(8 * buckets * BUCKET_SIZE))
+        self.data = array("Q", bytes(8 * buckets * BUCKET_SIZE))
+
+        # search generation, used to replace entries left over from earlier searches
+        self.generation = 0
+
+    def clear(self):
+        """empty every entry"""
+        # fresh zeroed arrays, far faster than zeroing the entries one by one
+        entries = len(self.keys)
+        self.keys = array("Q", bytes(8 * entries))
+        self.data = array("Q", bytes(8 * entries))
+        self.generation = 0
+
+    def new_search(self):
+        """start a new search so entries of older searches become replaceable"""
+        self.generation = (self.generation + 1) & 0xFF
+
+    def probe(self, key):
+        """(depth, bound, score, move) stored for a key or None, move 0 means no move"""
+        index = (key & self.mask) * BUCKET_SIZE
+        for slot in (index, index + 1):
+            if self.keys[slot] == key:
+                data = self.data[slot]
+                return ((data >> DEPTH_SHIFT) & 0xFF,
+                        (data >> BOUND_SHIFT) & 0x3,
+                        (data >> SCORE_SHIFT) - SCORE_OFFSET,
+                        data & 0xFFFF)
+        return None
+
+    def store(self, key, depth, bound, score, move):
+        """store a search result using the depth preferred / always replace scheme"""
+        index = (key & self.mask) * BUCKET_SIZE
+        data = self.data[index]
+        # the depth preferred slot takes the entry when it holds the same position,
+        # a shallower search or a result from an earlier search
+        if (self.keys[index] == key or depth >= (data >> DEPTH_SHIFT) & 0xFF or
+                (data >> GENERATION_SHIFT) & 0xFF != self.generation):
+            slot = index
+        else:
+            slot = index + 1
+
+        # keep the best move of the same position when the new result has none
+        if move == 0 and self.keys[slot] == key:
+            move = self.data[slot] & 0xFFFF
+
+        self.keys[slot] = key
+        self.data[slot] = (move |
+                           (min(depth, 0xFF) << DEPTH_SHIFT) |
+                           (bound << BOUND_SHIFT) |
+                           (self.generation << GENERATION_SHIFT) |
+                           ((score + SCORE_OFFSET) << SCORE_SHIFT))
+
+    def hashfull(self):
+        """permille of the first thousand entries used by the current search"""
+        sample = min(1000, len(self.keys))
+        used = 0
+        for i in range(sample):
+            if self.keys[i] and (self.data[i] >> GENERATION_SHIFT) & 0xFF == self.generation:
+                used += 1
+        return used * 1000 // sample
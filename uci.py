@@ -0,0 +1,228 @@
+import argparse
+import sys
+import threading
+import time
+
+from bitboard import WHITE, START_FEN
+from book import OpeningBook
+from move import move_name
+from rules import Rules
+from search import Search, MATE, MATE_BOUND
+from tablebase import Tablebases
+
+ENGINE_NAME = "pygame-chess"
+ENGINE_AUTHOR = "Sheriff"
+# deepest iteration when go does not give a depth
+MAX_DEPTH = 64
+# milliseconds kept back from every move for the move to reach the gui
+MOVE_OVERHEAD = 30
+# moves the remaining time is shared between when go does not say
+DEFAULT_MOVES_TO_GO = 30
+# go arguments followed by a number
+GO_NUMBERS = ("wtime", "btime", "winc", "binc", "movestogo", "movetime", "depth", "nodes", "mate")
+
+
+def think_time(options, side):
+    """seconds to search given the arguments of a go command, None for no time limit"""
+    if "movetime" in options:
+        return max(0.001, (options["movetime"] - MOVE_OVERHEAD) / 1000)
+    remaining = options.get("wtime" if side == WHITE else "btime")
+    if remaining is None:
+        return None
+    increment = options.get("winc" if side == WHITE else "binc", 0)
+    moves_to_go = options.get("movestogo") or DEFAULT_MOVES_TO_GO
+    budget = remaining / moves_to_go + increment * 3 / 4
+    # never spend more than half the clock on one move
+    budget = min(budget, remaining / 2) - MOVE_OVERHEAD
+    return max(0.01, budget / 1000)
+
+
+def score_text(score):
+    """uci score of a search score: centipawns, or moves to mate"""
+    # a mated root, or a score that is no real result, is clamped to mate in 0
+    score = max(-MATE, min(MATE, score))
+    if score >= MATE_BOUND:
+        return "mate {}".format((MATE - score + 1) // 2)
+    if score <= -MATE_BOUND:
+        return "mate -{}".format((MATE + score + 1) // 2) if score > -MATE else "mate 0"
+    return "cp {}".format(score)
+
+
+class UciEngine(object):
+    """uci protocol front end: reads commands, keeps the game in a pygame free
+    Rules object and searches on a worker thread, so stop and isready are
+    answered while a search is running"""
+    def __init__(self, search=None, output=sys.stdout):
+        # search object kept between moves so its transposition table carries over
+        self.search = search if search is not None else Search()
+        self.search.on_iteration = self.report
+        # game state, the same one the board window plays on
+        self.rules = Rules(log=None)
+        self.rules.reset(fen=START_FEN)
+        # fen and moves of the last position command
+        self.fen = START_FEN
+        self.moves = []
+        # stream the replies are written to
+        self.output = output
+        # lets the search thread and the command loop write whole lines
+        self.output_lock = threading.Lock()
+        # thread of the running search and the event that stops it
+        self.thread = None
+        self.stop_event = None
+        # position being searched
+        self.root = None
+
+    def send(self, line):
+        """write a reply line"""
+        with self.output_lock:
+            self.output.write(line + "\n")
+            self.output.flush()
+
+    def run(self, lines=sys.stdin):
+        """answer commands until quit or the end of the input"""
+        for line in lines:
+            if not self.handle(line):
+                break
+        self.stop()
+
+    def handle(self, line):
+        """answer one command, returning False on quit"""
+        tokens = line.split()
+        if not tokens:
+            return True
+        command = tokens[0]
+        if command == "uci":
+            self.send("id name {}".format(ENGINE_NAME))
+            self.send("id author {}".format(ENGINE_AUTHOR))
+            self.send("option name Hash type spin default {} min 1 max 1024".format(
+                self.search.table.size_mb))
+            self.send("uciok")
+        elif command == "isready":
+            self.send("readyok")
+        elif command == "ucinewgame":
+            self.stop()
+            self.search.table.clear()
+            if self.search.ordering is not None:
+                self.search.ordering.clear()
+        elif command == "setoption":
+            self.set_option(tokens[1:])
+        elif command == "position":
+            self.stop()
+            self.set_position(tokens[1:])
+        elif command == "go":
+            self.go(tokens[1:])
+        elif command == "stop":
+            self.stop()
+        elif command == "quit":
+            return False
+        elif command != "ponderhit":
+            self.send("info string unknown command {}".format(command))
+        return True
+
+    def set_option(self, tokens):
+        """setoption name <name> value <value>"""
+        if "name" not in tokens or "value" not in tokens:
+            return
+        name = " ".join(tokens[tokens.index("name") + 1:tokens.index("value")]).lower()
+        value = " ".join(tokens[tokens.index("value") + 1:])
+        if name == "hash":
+            try:
+                hash_mb = max(1, int(value))
+            except ValueError:
+                self.send("info string bad Hash value {}".format(value))
+                return
+            self.stop()
+            old = self.search
+            self.search = Search(hash_mb=hash_mb, book=old.book, tablebases=old.tablebases)
+            self.search.on_iteration = self.report
+
+    def set_position(self, tokens):
+        """position startpos|fen <fen> [moves <move> ...]"""
+        moves_at = tokens.index("moves") if "moves" in tokens else len(tokens)
+        if tokens[:1] == ["fen"]:
+            fen = " ".join(tokens[1:moves_at])
+        else:
+            fen = START_FEN
+        moves = tokens[moves_at + 1:]
+
+        # guis resend the whole game every move, so only play the new moves
+        # when the game continues the last position
+        if fen != self.fen or moves[:len(self.moves)] != self.moves:
+            try:
+                self.rules.reset(fen=fen)
+            except ValueError as error:
+                self.send("info string bad fen: {}".format(error))
+                return
+            self.fen = fen
+            self.moves = []
+        for name in moves[len(self.moves):]:
+            move = self.rules.position.parse_move(name)
+            if move is None:
+                self.send("info string illegal move {}".format(name))
+                break
+            self.rules.play_move("white" if self.rules.position.side == WHITE else "black", move)
+            self.moves.append(name)
+
+    def go(self, tokens):
+        """start searching the current position on a worker thread"""
+        self.stop()
+        options = {}
+        for i, token in enumerate(tokens):
+            if token in GO_NUMBERS and i + 1 < len(tokens):
+                try:
+                    options[token] = int(tokens[i + 1])
+                except ValueError:
+                    # the gui still waits for a bestmove, so search without it
+                    self.send("info string bad go {} value {}".format(token, tokens[i + 1]))
+        infinite = "infinite" in tokens or "ponder" in tokens
+
+        search = self.search
+        search.max_depth = options.get("depth", MAX_DEPTH)
+        search.node_limit = options.get("nodes")
+        search.time_limit = None if infinite else think_time(options, self.rules.position.side)
+        self.stop_event = threading.Event()
+        search.stop_event = self.stop_event
+        self.root = self.rules.position.copy()
+        self.thread = threading.Thread(target=self.think, args=(self.root, self.stop_event, infinite))
+        self.thread.daemon = True
+        self.thread.start()
+
+    def think(self, position, stop_event, infinite):
+        """search a position and send the best move"""
+        move = self.search.search(position)
+        # an infinite search only answers once it is told to stop
+        if infinite:
+            stop_event.wait()
+        self.send("bestmove {}".format(move_name(move) if move is not None else "0000"))
+
+    def stop(self):
+        """stop the running search and wait for its best move to be sent"""
+        if self.thread is not None:
+            self.stop_event.set()
+            self.thread.join()
+            self.thread = None
+
+    def report(self, search):
+        """send the result of a finished iteration"""
+        milliseconds = max(1, int((time.perf_counter() - search.start_time) * 1000))
+        line = " ".join(move_name(move) for move in search.principal_variation(self.root))
+        self.send("info depth {} seldepth {} score {} nodes {} time {} nps {} pv {}".format(
+            search.depth, search.seldepth, score_text(search.score), search.nodes, milliseconds,
+            search.nodes * 1000 // milliseconds, line))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="uci chess engine over stdin and stdout")
+    parser.add_argument("--hash", type=int, default=16, help="transposition table size in MB")
+    parser.add_argument("--book", default=None, help="opening book file to play from")
+    parser.add_argument("--tablebases", default=None, help="directory of endgame tables")
+    args = parser.parse_args(argv)
+
+    book = OpeningBook(args.book) if args.book else None
+    tablebases = Tablebases(args.tablebases) if args.tablebases else None
+    UciEngine(Search(hash_mb=args.hash, book=book, tablebases=tablebases)).run()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,24 @@
+# zobrist keys used to hash positions
+#
+# the keys come from a fixed seed so hashes are the same in every process,
+# which lets worker processes and opening books share them
+
+import random
+
+# seed of the key generator
+SEED = 0x5EED_C4E55
+
+_generator = random.Random(SEED)
+
+# key per colour, piece type and square
+PIECE_KEYS = [[[_generator.getrandbits(64) for square in range(64)]
+               for piece_type in range(6)]
+              for colour in range(2)]
+# key xored in when black is to move
+SIDE_KEY = _generator.getrandbits(64)
+# key per combination of the four castling right flags
+CASTLING_KEYS = [_generator.getrandbits(64) for rights in range(16)]
+# key per file of the en passant target square
+EP_KEYS = [_generator.getrandbits(64) for file_no in range(8)]
+
+del _generator